@@ -0,0 +1,366 @@
+# alloc_audit.py
+"""
+    Allocation audit: run render paths frame by frame; report any
+    frame that allocates
+
+    - a frame is one resumption of a coroutine up to its next
+        asyncio.sleep_ms(); drive() replaces the sleep with a reused
+        awaitable that returns at once: no event loop is needed
+    - device: gc is disabled and gc.mem_alloc() is read around each
+        frame
+    - host (CPython): tracemalloc blocks still allocated at the end of
+        each frame; CPython boxes ints above 256, so up to HOST_SLACK
+        bytes per frame are allowed
+        -- transient allocations, and small tuples and floats that
+            CPython reuses from free lists, are not seen as bytes:
+            project code is also traced by opcode, and any opcode that
+            allocates on MicroPython counts: tuple, list, dict and
+            string builds, closures, coroutine creation, *args calls
+            and true division (a float)
+        -- a library coroutine or generator started from project code,
+            such as asyncio.Event.wait(), counts as a coroutine creation
+    - both: the bytes of an empty frame are measured first and
+        subtracted, so that the driver itself is not counted
+
+    import alloc_audit; alloc_audit.main() on the device;
+    python -m bench --audit on the host
+"""
+
+import asyncio
+import gc
+
+try:
+    import tracemalloc
+except ImportError:  # MicroPython: gc.mem_alloc() deltas
+    tracemalloc = None
+
+HOST_SLACK = 64  # bytes: transient ints on CPython
+
+
+class _OpTrace:
+    """ host: count opcodes that allocate on MicroPython, in project code """
+
+    NAMES = ('BUILD_TUPLE', 'BUILD_LIST', 'BUILD_MAP', 'BUILD_SET',
+             'BUILD_STRING', 'BUILD_SLICE', 'BUILD_CONST_KEY_MAP',
+             'FORMAT_VALUE', 'MAKE_FUNCTION', 'CALL_FUNCTION_EX',
+             'RETURN_GENERATOR', 'LIST_EXTEND', 'DICT_MERGE')
+
+    def __init__(self):
+        import dis
+        import inspect
+        import os
+        self.ops = {dis.opmap[name] for name in self.NAMES if name in dis.opmap}
+        self.binary_op = dis.opmap.get('BINARY_OP')
+        self.true_divide = [op for op, _ in dis._nb_ops].index('NB_TRUE_DIVIDE') \
+            if hasattr(dis, '_nb_ops') else None
+        self.opname = dis.opname
+        self.resume = dis.opmap.get('RESUME')  # 3.11+: first op of a started frame
+        self.gen_flags = inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+        here = os.path.abspath(__file__)
+        self.root = os.path.dirname(here)
+        self.exclude = (here, os.path.join(self.root, 'bench'), os.path.join(self.root, 'host'))
+        self.n = 0
+        self.where = None  # first allocating opcode seen: 'file:line OP'
+
+    def _project(self, code):
+        """ return True if code is in a project module """
+        name = code.co_filename
+        return name.startswith(self.root) and not name.startswith(self.exclude)
+
+    def _started(self, frame):
+        """ return True if generator or coroutine frame is at its start """
+        if self.resume is None:
+            return frame.f_lasti < 0
+        code = frame.f_code.co_code
+        return code[frame.f_lasti] == self.resume and code[frame.f_lasti + 1] == 0
+
+    def _count(self, frame, what):
+        """ count an allocation in project frame """
+        self.n += 1
+        if self.where is None:
+            self.where = (f'{frame.f_code.co_filename[len(self.root) + 1:]}:'
+                          f'{frame.f_lineno} {what}')
+
+    def trace(self, frame, event, arg):
+        """ sys.settrace function: trace opcodes of project frames
+            - library coroutines and generators started by project code
+                count against the project frame
+        """
+        code = frame.f_code
+        if not self._project(code):
+            caller = frame.f_back
+            if (code.co_flags & self.gen_flags and caller is not None
+                    and self._project(caller.f_code) and self._started(frame)):
+                self._count(caller, f'{code.co_name}() coroutine')
+            return None
+        frame.f_trace_opcodes = True
+        frame.f_trace_lines = False
+        return self.opcode
+
+    def opcode(self, frame, event, arg):
+        if event == 'opcode':
+            code = frame.f_code.co_code
+            op = code[frame.f_lasti]
+            if op in self.ops or (op == self.binary_op
+                                  and code[frame.f_lasti + 1] == self.true_divide):
+                self._count(frame, self.opname[op])
+        return self.opcode
+
+
+_op_trace = None  # host only: set by audit()
+
+
+class _Yield:
+    """ awaitable: yield once to the driver; reused, so no allocation """
+
+    def __init__(self):
+        self.yielded = False
+        self.stop = StopIteration()
+
+    def __await__(self):
+        self.yielded = False
+        return self
+
+    __iter__ = __await__  # MicroPython awaits by iteration
+
+    def __next__(self):
+        if self.yielded:
+            raise self.stop
+        self.yielded = True
+        return None
+
+    def send(self, _):
+        return self.__next__()
+
+
+_YIELD = _Yield()
+
+
+def _sleep_ms(ms):
+    return _YIELD
+
+
+def drive(coro, n):
+    """ run coro for n resumptions, each up to its next asyncio.sleep_ms()
+        - no event loop: sleeps return at once
+    """
+    sleep_ms = asyncio.sleep_ms
+    asyncio.sleep_ms = _sleep_ms
+    try:
+        for _ in range(n):
+            coro.send(None)
+    except StopIteration:
+        pass
+    finally:
+        asyncio.sleep_ms = sleep_ms
+
+
+def _frame_bytes(coro):
+    """ return bytes allocated by one frame of coro
+        - host: blocks still allocated at the end of the frame
+    """
+    if tracemalloc:
+        current = tracemalloc.get_traced_memory()[0]
+        drive(coro, 1)
+        return tracemalloc.get_traced_memory()[0] - current
+    alloc_0 = gc.mem_alloc()
+    drive(coro, 1)
+    return gc.mem_alloc() - alloc_0
+
+
+def _frame_ops(coro):
+    """ host: return allocating opcodes in one frame of coro
+        - traced separately: tracing allocates for each call
+    """
+    import sys
+    n_ops = _op_trace.n
+    sys.settrace(_op_trace.trace)
+    try:
+        drive(coro, 1)
+    finally:
+        sys.settrace(None)
+    return _op_trace.n - n_ops
+
+
+async def _empty():
+    """ coro: frames that do nothing: driver cost """
+    while True:
+        await asyncio.sleep_ms(0)
+
+
+def _measure(coro, n):
+    """ return list of (bytes, opcodes) for n frames
+        - host: bytes of n frames, then opcodes of n more frames
+    """
+    drive(coro, 2)  # start-up is not a frame
+    n_bytes = [_frame_bytes(coro) for _ in range(n)]
+    if not tracemalloc:
+        return [(b, 0) for b in n_bytes]
+    ops = [_frame_ops(coro) for _ in range(n)]
+    return list(zip(n_bytes, ops))
+
+
+def audit(cases, n=200):
+    """ return list of (name, frames that allocate, worst bytes, where)
+        - cases: list of (name, coro)
+        - where: host only, the first allocating opcode seen, or None
+    """
+    global _op_trace
+    if tracemalloc:
+        tracemalloc.start()
+        _op_trace = _OpTrace()
+        slack = HOST_SLACK
+    else:
+        slack = 0
+    gc.collect()
+    gc.disable()
+    try:
+        empty = max([b for b, _ in _measure(_empty(), n)])
+        results = []
+        for name, coro in cases:
+            if tracemalloc:
+                _op_trace = _OpTrace()
+            frames = _measure(coro, n)
+            gc.collect()  # between cases only
+            n_bad = len([1 for b, ops in frames if b - empty > slack or ops])
+            worst = max([b for b, _ in frames]) - empty
+            where = _op_trace.where if tracemalloc else None
+            results.append((name, n_bad, max(worst, 0), where))
+            coro.close()
+    finally:
+        gc.enable()
+        if tracemalloc:
+            tracemalloc.stop()
+    return results
+
+
+def loop(fn, *args):
+    """ return coro calling fn(*args) once per frame: setter cases """
+    async def frames():
+        while True:
+            fn(*args)
+            await asyncio.sleep_ms(0)
+    return frames()
+
+
+class _Bars:
+    """ stand-in for a state's display: bar lengths as LcdApi computes them """
+
+    def __init__(self):
+        from lcd_1602 import LcdApi
+        self.bar_steps = LcdApi.bar_steps
+        self.steps = bytearray(2)  # by row
+
+    def write_bar(self, row, col, width, value, full=1):
+        self.steps[row] = self.bar_steps(width, value, full)
+
+
+class _State:
+    """ stand-in for a lighting state: show_fade() needs lcd only """
+
+    def __init__(self):
+        self.lcd = _Bars()
+
+
+def fade(nps):
+    """ return coro playing fades on nps: one frame per output change
+        - m_ms 0: no step waits, so each frame is one look-ahead and write
+        - as in a lighting state: output compared by nps.encode_lin, and
+            each write shown by LightingState.show_fade, on a bar stand-in
+            for the display
+    """
+    from keyframes import Track, FadeEngine
+    from lighting_state import LightingState
+    track = Track([(0, (0.0, 0.0, 0.0)), (600, (240.0, 0.1, 0.95)),
+                   (1200, (359.0, 1.0, 0.5)), (1800, (0.0, 0.0, 0.0))], 'in_out')
+    state = _State()
+    show_fade = LightingState.show_fade
+
+    def on_write(step, n_steps, rgb):
+        show_fade(state, step, n_steps, rgb)
+
+    fader = FadeEngine(nps.set_strip_lin, nps.write, on_write=on_write,
+                       encode=nps.encode_lin)
+
+    def active():
+        return True
+
+    return fader.play(track, 0, active)
+
+
+SEGMENTS_CF = {
+    'active': 'segments',
+    'profiles': {
+        'segments': {
+            'gamma': [2.6, 2.6, 2.6],
+            'scale': [1.0, 1.0, 1.0],
+            'segments': [
+                {'index': 0, 'count': 60, 'scale': [0.8, 0.9, 1.0]},
+                {'index': 120, 'count': 40, 'gamma': [2.2, 2.4, 2.6]}
+            ]
+        }
+    }
+}
+
+
+def segment_cases(nps):
+    """ return list of (name, coro): calibration-segment setters and fade
+        - nps is given the SEGMENTS_CF profile: seg_map paths
+    """
+    from calibration import Calibration
+    nps.set_calibration(Calibration(nps.n_pixels, cf=SEGMENTS_CF))
+    rgb = (255, 100, 0)
+    index_list = list(range(0, nps.n_pixels, 3))
+    return [
+        ('seg.set_strip_lin', loop(nps.set_strip_lin, rgb)),
+        ('seg.set_range_lin', loop(nps.set_range_lin, 40, 100, rgb)),
+        ('seg.set_list_lin', loop(nps.set_list_lin, index_list, rgb)),
+        ('seg.encode_lin_sets', loop(nps.encode_lin_sets, rgb)),
+        ('seg.fade', fade(nps)),
+    ]
+
+
+def strip_cases(nps, cs):
+    """ return list of (name, coro): effects, fade and setters on PixelStrip nps """
+    from pixel_strip_helper import np_arc_weld, np_twinkler, colour_chase, two_flash
+    ev = asyncio.Event()
+    ev.set()
+    rgb = (255, 100, 0)
+    return [
+        ('effect.np_arc_weld', np_arc_weld(nps, cs, 0, ev)),
+        ('effect.np_twinkler', np_twinkler(nps, 0, ev)),
+        ('effect.colour_chase',
+         colour_chase(nps, [(255, 0, 0), (0, 255, 0), (0, 0, 255)], ev)),
+        ('effect.two_flash', two_flash(nps, 0, rgb, ev)),
+        ('fade.play', fade(nps)),
+        ('strip.set_strip_lin', loop(nps.set_strip_lin, rgb)),
+        ('strip.set_range_lin', loop(nps.set_range_lin, 10, 64, rgb)),
+        ('strip.encode_rgb_lg', loop(nps.encode_rgb_lg, 'orange', 128)),
+        ('strip.write', loop(nps.write)),
+    ]
+
+
+def main(pin=15, n_pixels=238, n=200):
+    """ audit the strip effects, fade and setters, with and without
+        calibration segments; return number of failures
+    """
+    from colour_space import ColourSpace
+    from pixel_strip import PixelStrip
+    from ws2812 import Ws2812
+    nps = PixelStrip(Ws2812(pin), n_pixels)
+    nps_seg = PixelStrip(Ws2812(pin), n_pixels)
+    results = audit(strip_cases(nps, ColourSpace()) + segment_cases(nps_seg), n)
+    n_fail = 0
+    for name, n_bad, worst, where in results:
+        flag = '' if n_bad == 0 else '  ALLOCATES'
+        if n_bad and where:
+            flag += f': {where}'
+        print(f'{name:<24} {n_bad:>4}/{n} frames, worst {worst} bytes{flag}')
+        if n_bad:
+            n_fail += 1
+    print(f'{n_fail} failures' if n_fail else 'no allocations')
+    return n_fail
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# bench/__init__.py
+"""
+    Host benchmarks of the hot paths, with machine, rp2 and micropython
+    stand-ins from host/
+
+    python -m bench [--save FILE] [--compare [FILE]] [--tolerance 0.4] [--only NAME]
+                    [--runs N]
+    python -m bench --audit [N]: allocation audit; see alloc_audit.py
+
+    - each case is timed for at least MIN_S per run, median of REPEAT
+        runs: the median is steadier than the best on a shared host
+    - results are ops/sec on this host; relative results are ops per
+        reference-loop op, the reference timed just before and just
+        after each case, so that host speed changes between and during
+        runs cancel out
+    - --compare reports each relative result against a saved run and
+        exits 1 if any case is slower than (1 - tolerance) x baseline;
+        a flagged case is re-timed up to RETRY times first, each re-time
+        taking the best, not the median, of REPEAT runs of the case and
+        of the reference, and its best relative result is kept: on a
+        shared host interference only slows a run, while a real
+        regression stays slow in every run
+    - --runs N: each case's median over N runs: the stored
+        bench/baseline.json is saved with --runs 3, so that one slow
+        run of a case does not set its baseline
+"""
+
+import host
+host.install()
+
+import gc
+import json
+import os
+import sys
+import time
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+MIN_S = 0.05
+REPEAT = 9
+RETRY = 3
+
+
+def time_case(fn, best=False):
+    """ return ops/sec for fn(n), which runs n operations
+        - median of REPEAT runs; best of REPEAT runs if best
+        - garbage collection is disabled while timing, as timeit does
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        return _time_case(fn, best)
+    finally:
+        gc.enable()
+
+
+def _time_case(fn, best):
+    """ time_case() with garbage collection disabled """
+    n = 1
+    while True:
+        t_0 = time.perf_counter()
+        fn(n)
+        t = time.perf_counter() - t_0
+        if t >= MIN_S:
+            break
+        n *= 2
+    times = [t]
+    for _ in range(REPEAT - 1):
+        t_0 = time.perf_counter()
+        fn(n)
+        times.append(time.perf_counter() - t_0)
+    times.sort()
+    return n / times[0 if best else len(times) // 2]
+
+
+def reference(n):
+    """ reference loop: plain integer and list operations """
+    a = [0] * 256
+    for i in range(n):
+        a[i & 0xff] += i
+
+
+def _time_relative(fn, best=False):
+    """ return (ops/sec, ops per reference op) for case fn """
+    ref_0 = time_case(reference, best)
+    ops = time_case(fn, best)
+    ref_1 = time_case(reference, best)
+    return ops, ops * 2 / (ref_0 + ref_1)
+
+
+def run(only=None):
+    """ run cases; return results dict """
+    from bench.cases import CASES
+    results = {}
+    relative = {}
+    for name, fn in CASES:
+        if only and only not in name:
+            continue
+        ops, rel = _time_relative(fn)
+        results[name] = round(ops, 1)
+        relative[name] = round(rel, 6)
+    return {
+        'python': sys.version.split()[0],
+        'results': results,
+        'relative': relative
+    }
+
+
+def median(runs):
+    """ return run of per-case median results over runs """
+    mid = len(runs) // 2
+    merged = {'python': runs[0]['python'], 'results': {}, 'relative': {}}
+    for name in runs[0]['relative']:
+        pairs = sorted([(r['relative'][name], r['results'][name]) for r in runs])
+        merged['relative'][name], merged['results'][name] = pairs[mid]
+    return merged
+
+
+def retry(run_, baseline, tolerance):
+    """ re-time cases of run_ that are slower than (1 - tolerance) x
+        baseline, up to RETRY times each; keep the best relative result
+    """
+    from bench.cases import CASES
+    base = baseline['relative']
+    for name, fn in CASES:
+        if name not in run_['relative'] or name not in base:
+            continue
+        for _ in range(RETRY):
+            if run_['relative'][name] / base[name] >= 1 - tolerance:
+                break
+            ops, rel = _time_relative(fn, best=True)
+            if rel > run_['relative'][name]:
+                run_['results'][name] = round(ops, 1)
+                run_['relative'][name] = round(rel, 6)
+
+
+def compare(run_, baseline, tolerance):
+    """ return (lines, n_regressions) against a baseline run """
+    lines = []
+    n_reg = 0
+    base = baseline['relative']
+    for name, ops in run_['results'].items():
+        if name not in base:
+            lines.append(f'{name:<40} {ops:>14,.0f}  (new)')
+            continue
+        ratio = run_['relative'][name] / base[name]
+        flag = ''
+        if ratio < 1 - tolerance:
+            flag = '  REGRESSION'
+            n_reg += 1
+        lines.append(f'{name:<40} {ops:>14,.0f} {ratio:>7.2f}x{flag}')
+    return lines, n_reg
+
+
+def save(run_, filename):
+    with open(filename, 'w') as f:
+        json.dump(run_, f, indent=1)
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
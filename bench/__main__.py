@@ -0,0 +1,41 @@
+# bench/__main__.py
+""" python -m bench: see bench/__init__.py """
+
+import argparse
+
+import bench
+
+
+def main():
+    parser = argparse.ArgumentParser(description='host benchmarks of hot paths')
+    parser.add_argument('--save', help='write results as JSON')
+    parser.add_argument('--compare', nargs='?', const=bench.BASELINE,
+                        help='compare with saved JSON; default: bench/baseline.json')
+    parser.add_argument('--tolerance', type=float, default=0.4,
+                        help='allowed slow-down fraction before a regression')
+    parser.add_argument('--only', help='run cases whose name contains ONLY')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='median of RUNS runs of each case')
+    parser.add_argument('--audit', type=int, nargs='?', const=200, metavar='N',
+                        help='audit N frames of each render path for allocations')
+    args = parser.parse_args()
+    if args.audit:
+        import alloc_audit
+        return 1 if alloc_audit.main(n=args.audit) else 0
+    run_ = bench.median([bench.run(args.only) for _ in range(max(args.runs, 1))])
+    if args.save:
+        bench.save(run_, args.save)
+    if args.compare:
+        baseline = bench.load(args.compare)
+        bench.retry(run_, baseline, args.tolerance)
+        lines, n_reg = bench.compare(run_, baseline, args.tolerance)
+        print('\n'.join(lines))
+        print(f'{n_reg} regressions' if n_reg else 'no regressions')
+        return 1 if n_reg else 0
+    for name, ops in run_['results'].items():
+        print(f'{name:<40} {ops:>14,.0f} ops/s')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
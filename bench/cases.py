@@ -0,0 +1,262 @@
+# bench/cases.py
+"""
+    Benchmark cases: (name, fn); fn(n) runs n operations
+    - strip: 238 pixels, as the layout; grid: 8 x 8; block grid: 2 blocks
+    - effect cases run n frames: one frame is one resumption of the
+        effect coroutine, up to its next sleep
+    - grids are built without a charset: the setters do not use it
+    - queue cases that need an event loop share one loop, so that loop
+        creation is not timed
+"""
+
+import asyncio
+import random
+
+from alloc_audit import drive
+from colour_space import ColourSpace
+from pixel_strip import PixelStrip, Grid, BlockGrid
+from pixel_strip_helper import np_arc_weld, np_twinkler, colour_chase, two_flash
+from queue import Queue, RingQueue, EventBus
+from ws2812 import Ws2812
+
+N_PIXELS = 238
+RGB = (255, 100, 0)
+CLR = Ws2812.encode_rgb(RGB)
+
+nps = PixelStrip(Ws2812(15), N_PIXELS)
+grid = Grid(Ws2812(15), 8, 8)
+b_grid = BlockGrid(Ws2812(15), 8, 8, 2)
+cs = ColourSpace()
+index_list = list(range(0, N_PIXELS, 3))
+coord_list = [(c, r) for c in range(8) for r in range(0, 8, 2)]
+loop = asyncio.new_event_loop()
+
+CASES = []
+
+
+def case(name):
+    """ decorator: register case """
+    def register(fn):
+        CASES.append((name, fn))
+        return fn
+    return register
+
+
+# === PixelStrip setters
+
+@case('strip.set_pixel')
+def _(n):
+    for i in range(n):
+        nps.set_pixel(i % N_PIXELS, CLR)
+
+
+@case('strip.set_strip')
+def _(n):
+    for _ in range(n):
+        nps.set_strip(CLR)
+
+
+@case('strip.set_range 64')
+def _(n):
+    for i in range(n):
+        nps.set_range(i, 64, CLR)
+
+
+@case('strip.set_list 80')
+def _(n):
+    for _ in range(n):
+        nps.set_list(index_list, CLR)
+
+
+@case('strip.set_pixel_rgb')
+def _(n):
+    for i in range(n):
+        nps.set_pixel_rgb(i % N_PIXELS, RGB)
+
+
+@case('strip.set_strip_rgb')
+def _(n):
+    for _ in range(n):
+        nps.set_strip_rgb(RGB)
+
+
+@case('strip.set_strip_lin')
+def _(n):
+    for _ in range(n):
+        nps.set_strip_lin(RGB)
+
+
+@case('strip.set_range_lin 64')
+def _(n):
+    for i in range(n):
+        nps.set_range_lin(i, 64, RGB)
+
+
+@case('strip.set_list_lin 80')
+def _(n):
+    for _ in range(n):
+        nps.set_list_lin(index_list, RGB)
+
+
+# === Grid setters
+
+@case('grid.set_grid_rgb')
+def _(n):
+    for _ in range(n):
+        grid.set_grid_rgb(RGB)
+
+
+@case('grid.set_col_rgb')
+def _(n):
+    for i in range(n):
+        grid.set_col_rgb(i % 8, RGB)
+
+
+@case('grid.set_row_rgb')
+def _(n):
+    for i in range(n):
+        grid.set_row_rgb(i % 8, RGB)
+
+
+@case('grid.set_coord_list_rgb 32')
+def _(n):
+    for _ in range(n):
+        grid.set_coord_list_rgb(coord_list, RGB)
+
+
+@case('grid.set_diagonal_rgb')
+def _(n):
+    for i in range(n):
+        grid.set_diagonal_rgb(RGB, i & 1)
+
+
+@case('block_grid.shift_grid')
+def _(n):
+    for _ in range(n):
+        drive(b_grid.shift_grid(), b_grid.block_cols + 1)
+
+
+# === encoding and colour conversions
+
+@case('encode_rgb')
+def _(n):
+    encode_rgb = nps.encode_rgb
+    for _ in range(n):
+        encode_rgb(RGB)
+
+
+@case('encode_lin')
+def _(n):
+    encode_lin = nps.encode_lin
+    for _ in range(n):
+        encode_lin(RGB)
+
+
+@case('colour_space.rgb_lg')
+def _(n):
+    for i in range(n):
+        cs.rgb_lg(RGB, i & 0xff)
+
+
+@case('colour_space.rgb_lg name')
+def _(n):
+    for i in range(n):
+        cs.rgb_lg('orange', i & 0xff)
+
+
+@case('colour_space.rgb_g')
+def _(n):
+    for _ in range(n):
+        cs.rgb_g(RGB)
+
+
+@case('colour_space.hsv_rgb')
+def _(n):
+    for i in range(n):
+        cs.hsv_rgb((i % 360, 0.8, 0.6))
+
+
+@case('colour_space.gamma_u16 lookup')
+def _(n):
+    lut = cs.gamma_u16(12)
+    for i in range(n):
+        lut[i & 0xfff]
+
+
+# === pixel_strip_helper effects: frames
+
+def _effect(coro_fn, *args):
+    """ return case fn: run n frames of a new effect coroutine """
+    def fn(n):
+        random.seed(1)
+        ev = asyncio.Event()
+        ev.set()
+        drive(coro_fn(*args, ev), n)
+    return fn
+
+
+CASES.append(('effect.np_arc_weld frame', _effect(np_arc_weld, nps, cs, 0)))
+CASES.append(('effect.np_twinkler frame', _effect(np_twinkler, nps, 0)))
+CASES.append(('effect.colour_chase frame',
+              _effect(colour_chase, nps, [(255, 0, 0), (0, 255, 0), (0, 0, 255)])))
+CASES.append(('effect.two_flash frame', _effect(two_flash, nps, 0, RGB)))
+
+
+# === queue throughput: items
+
+@case('queue.Queue put/get')
+def _(n):
+    q = Queue(32)
+
+    async def producer():
+        for i in range(n):
+            await q.put(i)
+
+    async def consumer():
+        for _ in range(n):
+            await q.get()
+
+    async def main():
+        await asyncio.gather(producer(), consumer())
+
+    loop.run_until_complete(main())
+
+
+@case('queue.Queue nowait pow2')
+def _(n):
+    q = Queue(32, pow2=True)
+    for i in range(n):
+        q.put_nowait(i)
+        q.get_nowait()
+
+
+@case('queue.Queue put_many/get_many 16')
+def _(n):
+    q = Queue(32)
+    items = list(range(16))
+
+    async def main():
+        for _ in range(n // 16 + 1):
+            await q.put_many(items)
+            await q.get_many(16)
+
+    loop.run_until_complete(main())
+
+
+@case('queue.RingQueue nowait')
+def _(n):
+    q = RingQueue(8)
+    for i in range(n):
+        q.put_nowait(i)
+        q.get_nowait()
+
+
+@case('queue.EventBus publish 2 subscribers')
+def _(n):
+    bus = EventBus()
+    q_0 = bus.subscribe(('button',), length=8)
+    q_1 = bus.subscribe(('button',), length=8)
+    for _ in range(n):
+        bus.publish_nowait('button', 'A1')
+        q_0.get_nowait()
+        q_1.get_nowait()
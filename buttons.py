@@ -4,14 +4,17 @@
     class Button implements a click event
     class HoldButton extends Button to include a hold event
     - button methods are coroutines and include self-polling methods
-    class ButtonSet implements a group of buttons returning events via a buffer
+    class ButtonGroup implements a group of buttons publishing events to a bus
+    class IrqButtonGroup: as ButtonGroup, driven by pin interrupts
+    - one shared task for all buttons; idle buttons cost nothing
 """
 
 import asyncio
+from array import array
 
-from time import ticks_ms, ticks_diff
+from time import ticks_ms, ticks_diff, ticks_add
 from machine import Pin, Signal
-from micropython import const
+from micropython import const, schedule
 
 
 class Button:
@@ -56,6 +59,10 @@ class Button:
         self.ev_type = self.WAIT
         self.press_ev.clear()
 
+    def classify(self, held_ms):
+        """ return event type for press of held_ms """
+        return self.CLICK
+
 
 class HoldButton(Button):
     """ button add hold event """
@@ -88,6 +95,10 @@ class HoldButton(Button):
                 prev_pin_state = pin_state
             await asyncio.sleep_ms(self.POLL_INTERVAL)
 
+    def classify(self, held_ms):
+        """ return event type for press of held_ms """
+        return self.CLICK if held_ms < self.T_HOLD else self.HOLD
+
     def __str__(self):
         return f'{self.name} {self.ev_type}'
 
@@ -98,23 +109,23 @@ class HoldButton(Button):
 class ButtonGroup:
     """
         Instantiates a group of Button and/or HoldButton objects.
-        Event parameters are returned through a single-item buffer
+        Events are published to topic TOPIC of a queue.EventBus
+        - events are queued by each subscriber; none are dropped while
+            the system is busy unless a subscriber queue overflows
         Coro poll-buttons task must be created externally to avoid side effects
-        - buffer put() is coordinated with by btn_lock
-        - this is acquired and cleared by the calling method(s)
     """
 
-    def __init__(self, button_set, buffer_):
+    TOPIC = const('button')
+
+    def __init__(self, button_set, bus_):
         self.button_set = button_set
-        self.buffer = buffer_
-        self.btn_lock = asyncio.Lock()
+        self.bus = bus_
 
     async def process_event(self, btn):
         """ coro: passes a button event to the system """
         while True:
             await btn.press_ev.wait()
-            if not self.btn_lock.locked():
-                await self.buffer.put(btn.name + btn.ev_type)
+            self.bus.publish_nowait(self.TOPIC, btn.name + btn.ev_type)
             btn.clear_state()
 
     def poll_buttons(self):
@@ -128,3 +139,119 @@ class ButtonGroup:
         print('Buttons:')
         for b in self.button_set:
             print(f'  pin: {b.pin}; name: {b.name}; mode: {b.mode}')
+
+
+class IrqButtonGroup(ButtonGroup):
+    """
+        ButtonGroup driven by pin edge interrupts
+        - IRQ handler captures (button, ticks_ms) into a preallocated ring,
+            then schedules a wake-up of the shared task
+        - a changed pin level must be stable for DEBOUNCE ms: each edge
+            (re)sets the button settle deadline; pending deadlines are
+            kept in time order
+        - the shared task sleeps until woken by an edge or until the
+            earliest deadline; classification is as for Button/HoldButton
+        - events are published on release, as 'A1', 'U2', ...
+    """
+
+    DEBOUNCE = const(20)  # ms
+    RING_LEN = const(16)
+
+    def __init__(self, button_set, bus_):
+        super().__init__(button_set, bus_)
+        n = len(button_set)
+        self._edge_btn = bytearray(self.RING_LEN)
+        self._edge_t = array('i', [0] * self.RING_LEN)
+        self._head = 0
+        self._n = 0
+        self.overruns = 0  # edges lost from a full ring
+        self._scheduled = False
+        self._flag = asyncio.ThreadSafeFlag()
+        self._wake_cb = self._wake  # bound once: no allocation in the IRQ
+        self._stable = bytearray(n)  # debounced level: 1 is pressed
+        self._settle_t = array('i', [0] * n)  # ms: last edge
+        self._press_t = array('i', [0] * n)  # ms: debounced press
+        self._pending = []  # button indices, in deadline order
+        self._handlers = [self._make_handler(i) for i in range(n)]
+
+    def _make_handler(self, index):
+        """ return IRQ handler for button index """
+        def handler(_):
+            self._edge(index)
+        return handler
+
+    def _edge(self, index):
+        """ IRQ: capture edge; no allocation """
+        if self._n == self.RING_LEN:
+            self.overruns += 1
+        else:
+            i = (self._head + self._n) % self.RING_LEN
+            self._edge_btn[i] = index
+            self._edge_t[i] = ticks_ms()
+            self._n += 1
+        if not self._scheduled:
+            self._scheduled = True
+            schedule(self._wake_cb, None)
+
+    def _wake(self, _):
+        """ scheduled: wake the shared task """
+        self._scheduled = False
+        self._flag.set()
+
+    def _drain(self):
+        """ move captured edges to the time-ordered pending list """
+        pending = self._pending
+        while self._n:
+            index = self._edge_btn[self._head]
+            self._settle_t[index] = self._edge_t[self._head]
+            self._head = (self._head + 1) % self.RING_LEN
+            self._n -= 1
+            # settle deadline restarts: move button to end of list
+            if index in pending:
+                pending.remove(index)
+            pending.append(index)
+
+    def _settle(self, index):
+        """ button level stable: publish event on release """
+        btn = self.button_set[index]
+        level = 1 if btn._hw_in.value() else 0
+        if level == self._stable[index]:
+            return
+        self._stable[index] = level
+        t_edge = self._settle_t[index]
+        if level:
+            self._press_t[index] = t_edge
+        else:
+            ev_type = btn.classify(ticks_diff(t_edge, self._press_t[index]))
+            self.bus.publish_nowait(self.TOPIC, btn.name + ev_type)
+
+    async def scan(self):
+        """ coro: single task for all buttons """
+        pending = self._pending
+        debounce = self.DEBOUNCE
+        settle_t = self._settle_t
+        while True:
+            if pending:
+                wait_ms = ticks_diff(
+                    ticks_add(settle_t[pending[0]], debounce), ticks_ms())
+                if wait_ms > 0:
+                    try:
+                        await asyncio.wait_for_ms(self._flag.wait(), wait_ms)
+                    except asyncio.TimeoutError:
+                        pass
+            else:
+                await self._flag.wait()
+            self._drain()
+            now = ticks_ms()
+            while pending and ticks_diff(
+                    now, ticks_add(settle_t[pending[0]], debounce)) >= 0:
+                self._settle(pending.pop(0))
+
+    def poll_buttons(self):
+        """ enable pin interrupts and start the shared task """
+        for i, b in enumerate(self.button_set):
+            self._stable[i] = 1 if b._hw_in.value() else 0
+            Pin(b.pin, Pin.IN, Pin.PULL_UP).irq(
+                handler=self._handlers[i],
+                trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING)
+        asyncio.create_task(self.scan())
@@ -0,0 +1,98 @@
+# calibration.py
+"""
+    Per-strip colour calibration profiles
+
+    Profiles are read from a JSON file through config.read_cf:
+    - gamma: per-channel gamma exponent [r, g, b]
+    - scale: per-channel maximum scale [r, g, b] in range 0.0 ... 1.0
+    - segments: optional list of pixel-range overrides, each as:
+        {'index': i, 'count': n, 'gamma': [r, g, b], 'scale': [r, g, b]}
+        -- gamma or scale omitted from a segment is taken from the profile
+
+    Each profile is compiled at boot into:
+    - lut_sets: tuple of (R, G, B) lookup tables; each table is 256-entry bytes
+        -- set 0 is the profile; sets 1... are the segment overrides
+    - seg_map: bytearray of table-set index per pixel; None if no segments
+    Switching profile swaps the table references only: nothing is rebuilt.
+"""
+
+from config import read_cf
+from colour_space import ColourSpace
+
+
+class Calibration:
+    """ compiled calibration profiles for a pixel strip of n_pixels """
+
+    CF_FILE = 'calibration.json'
+    DEFAULT = 'default'  # active profile if the file names none
+
+    # default profile matches ColourSpace.RGB_GAMMA for all channels
+    default_cf = {
+        'active': 'default',
+        'profiles': {
+            'default': {
+                'gamma': [ColourSpace.GAMMA, ColourSpace.GAMMA, ColourSpace.GAMMA],
+                'scale': [1.0, 1.0, 1.0],
+                'segments': []
+            }
+        }
+    }
+
+    def __init__(self, n_pixels_, filename=CF_FILE, cf=None):
+        """ cf: calibration dict, used instead of reading filename """
+        self.n_pixels = n_pixels_
+        self._luts = {}  # (gamma, scale): table; identical channels share a table
+        if cf is None:
+            cf = read_cf(filename, self.default_cf)
+        if not cf.get('profiles'):
+            raise ValueError(f'{filename}: no calibration profiles')
+        self.profiles = {}
+        for name in cf['profiles']:
+            self.profiles[name] = self.compile_profile(cf['profiles'][name])
+        self.name = None
+        self.lut_sets = None
+        self.seg_map = None
+        active = cf.get('active', self.DEFAULT)
+        if active not in self.profiles:
+            raise ValueError(f'{filename}: active profile {active!r} not found')
+        self.set_profile(active)
+
+    def build_lut(self, gamma_, scale_):
+        """ return 256-entry gamma-corrected and scaled table """
+        key = (gamma_, scale_)
+        if key not in self._luts:
+            scale_ = min(max(scale_, 0.0), 1.0)
+            lut = bytearray(256)
+            for x in range(256):
+                lut[x] = round(pow(x / 255, gamma_) * 255 * scale_)
+            self._luts[key] = bytes(lut)
+        return self._luts[key]
+
+    def build_lut_set(self, gamma_, scale_):
+        """ return (R, G, B) tables for per-channel gamma and scale """
+        return (self.build_lut(gamma_[0], scale_[0]),
+                self.build_lut(gamma_[1], scale_[1]),
+                self.build_lut(gamma_[2], scale_[2]))
+
+    def compile_profile(self, profile_):
+        """ return (lut_sets, seg_map) for a profile dict """
+        gamma = profile_.get('gamma', self.default_cf['profiles']['default']['gamma'])
+        scale = profile_.get('scale', [1.0, 1.0, 1.0])
+        lut_sets = [self.build_lut_set(gamma, scale)]
+        segments = profile_.get('segments', [])
+        if not segments:
+            return tuple(lut_sets), None
+        seg_map = bytearray(self.n_pixels)
+        for seg in segments:
+            lut_sets.append(self.build_lut_set(seg.get('gamma', gamma), seg.get('scale', scale)))
+            set_index = len(lut_sets) - 1
+            start = max(seg['index'], 0)
+            end = min(seg['index'] + seg['count'], self.n_pixels)
+            for i in range(start, end):
+                seg_map[i] = set_index
+        return tuple(lut_sets), seg_map
+
+    def set_profile(self, name_):
+        """ make name_ the active profile """
+        self.lut_sets, self.seg_map = self.profiles[name_]
+        self.name = name_
@@ -1,6 +1,8 @@
 # rgb.py
 """ RGB values and methods """
 
+from array import array
+
 from micropython import const
 
 
@@ -11,7 +13,7 @@ class ColourSpace:
         - methods are all class methods; perhaps should just be functions?
         - name suffixes: _lg, _l, _g:
             -- l: level,  g: gamma
-        -
+        - gamma_u16() returns 16-bit PWM tables for 8- to 12-bit input
     """
 
     # commonly used RGB colour "templates"
@@ -46,6 +48,24 @@ class ColourSpace:
         RGB_GAMMA.append(round(pow(x / 255, GAMMA) * 255))
     RGB_GAMMA = tuple(RGB_GAMMA)
 
+    _u16_luts = {}  # (bits, gamma): array('H')
+
+    @classmethod
+    def gamma_u16(cls, bits=8, gamma=GAMMA):
+        """ return gamma lookup table: bits-bit linear level to u16 duty cycle
+            - tables are built on first use and shared
+            - 10 or 12 bits give sub-8-bit steps at the bottom of the curve
+        """
+        key = (bits, gamma)
+        lut = cls._u16_luts.get(key)
+        if lut is None:
+            top = (1 << bits) - 1
+            lut = array('H', [0] * (top + 1))
+            for x in range(top + 1):
+                lut[x] = round(pow(x / top, gamma) * 65535)
+            cls._u16_luts[key] = lut
+        return lut
+
     @classmethod
     def rgb_lg(cls, rgb_, level_=255):
         """ return RGB, level and gamma corrected """
@@ -0,0 +1,104 @@
+# dual_core.py
+"""
+    Dual-core strip writes: core 1 sends frames to the PIO while core 0
+    runs asyncio: states, effects, input and display
+
+    - core 0 renders into the strip array as before; install() replaces
+        the strip write() so that the frame is copied into the back
+        buffer, under the lock, and marked ready: core 0 does not wait
+        for the PIO
+    - core 1 (_thread) swaps the front and back buffers under the lock
+        when a frame is ready, then puts the front buffer to the PIO with
+        Ws2812.write_arr(): a full TX FIFO blocks core 1 only
+    - the lock is held for the copy and the swap, never for a put
+    - a frame submitted before core 1 has taken the previous one
+        replaces it, and is counted as dropped
+    - the same code runs under CPython threads on the host:
+        python -m host.sim_dual compares single- and dual-core throughput
+"""
+
+import _thread
+from array import array
+
+from time import sleep_us, ticks_ms, ticks_diff
+from micropython import const
+
+
+class DualCoreWriter:
+    """ double-buffered frame hand-off from core 0 to a core-1 writer """
+
+    IDLE_US = const(200)  # core 1 poll interval while no frame is ready
+
+    def __init__(self, driver, n_pixels):
+        self.driver = driver
+        self.src = None  # strip array: set by install()
+        self.front = array('I', [0] * n_pixels)  # core 1: being put
+        self.back = array('I', [0] * n_pixels)  # core 0: next frame
+        self.lock = _thread.allocate_lock()
+        self.ready = False
+        self.running = False
+        self.stopped = True
+        self.n_submitted = 0
+        self.n_written = 0
+        self.n_dropped = 0
+
+    def install(self, nps):
+        """ replace nps.write with a hand-off to core 1; start core 1 """
+        self.src = nps.arr
+        nps.write = self.write
+        self.start()
+
+    def write(self):
+        """ core 0: hand the strip array to core 1 """
+        lock = self.lock
+        lock.acquire()
+        self.back[:] = self.src
+        if self.ready:
+            self.n_dropped += 1
+        self.ready = True
+        lock.release()
+        self.n_submitted += 1
+
+    def _core_1(self):
+        """ core 1: put each ready frame """
+        lock = self.lock
+        write_arr = self.driver.write_arr
+        try:
+            while self.running:
+                lock.acquire()
+                ready = self.ready
+                if ready:
+                    self.front, self.back = self.back, self.front
+                    self.ready = False
+                lock.release()
+                if ready:
+                    write_arr(self.front)
+                    self.n_written += 1
+                else:
+                    sleep_us(self.IDLE_US)
+        finally:
+            self.running = False
+            self.stopped = True  # also if the writer raised
+
+    def start(self):
+        """ start the core-1 writer """
+        self.running = True
+        self.stopped = False
+        _thread.start_new_thread(self._core_1, ())
+
+    def stop(self, timeout_ms=100):
+        """ stop the core-1 writer after any frame in progress
+            - return True if core 1 stopped within timeout_ms
+        """
+        self.running = False
+        t_0 = ticks_ms()
+        while not self.stopped:
+            if ticks_diff(ticks_ms(), t_0) > timeout_ms:
+                return False
+            sleep_us(self.IDLE_US)
+        return True
+
+    def summary(self):
+        """ return one-line summary """
+        return (f'submitted {self.n_submitted} written {self.n_written} '
+                f'dropped {self.n_dropped}')
@@ -0,0 +1,152 @@
+# expander.py
+"""
+    Buttons on I2C GPIO expanders, for panels with more inputs than free pins
+    class Pcf8575, class Mcp23017: 16 inputs per chip, read in one transaction
+    class ExpanderButton: click, or click and hold, on one expander pin
+    class ExpanderButtonGroup: as ButtonGroup; one task scans all chips
+    - inputs are pulled up: a pressed button reads 0
+    - each scan diffs the 16-bit level mask of each chip against the
+        previous scan; a change is accepted when 2 scans agree (debounce)
+    - events are published on release, as 'A1', 'U2', ...
+"""
+
+import asyncio
+from array import array
+
+from time import ticks_ms, ticks_us, ticks_diff
+from micropython import const
+
+from buttons import Button, HoldButton, ButtonGroup
+
+
+class Pcf8575:
+    """ PCF8575: quasi-bidirectional pins; written high to act as inputs """
+
+    def __init__(self, i2c, addr=0x20):
+        self.i2c = i2c
+        self.addr = addr
+        self._buf = bytearray(2)
+        self.i2c.writeto(addr, b'\xff\xff')
+
+    def read(self):
+        """ return pin levels: P00 is bit 0, P17 is bit 15 """
+        self.i2c.readfrom_into(self.addr, self._buf)
+        return self._buf[0] | self._buf[1] << 8
+
+
+class Mcp23017:
+    """ MCP23017: registers in default (IOCON.BANK = 0) sequential order """
+
+    IODIRA = const(0x00)
+    GPPUA = const(0x0c)
+    GPIOA = const(0x12)
+
+    def __init__(self, i2c, addr=0x20):
+        self.i2c = i2c
+        self.addr = addr
+        self._buf = bytearray(2)
+        self.i2c.writeto_mem(addr, self.IODIRA, b'\xff\xff')  # all inputs
+        self.i2c.writeto_mem(addr, self.GPPUA, b'\xff\xff')  # all pulled up
+
+    def read(self):
+        """ return pin levels: GPA0 is bit 0, GPB7 is bit 15 """
+        self.i2c.readfrom_mem_into(self.addr, self.GPIOA, self._buf)
+        return self._buf[0] | self._buf[1] << 8
+
+
+class ExpanderButton:
+    """ button on expander chip pin; click, or click and hold """
+
+    def __init__(self, chip, bit, name='', hold=False):
+        self.chip = chip  # index in group chips
+        self.bit = bit
+        self.pin = f'{chip}.{bit}'
+        self.name = name if name else self.pin
+        self.hold = hold
+        self.mode = 'click or hold' if hold else 'click'
+
+    def classify(self, held_ms):
+        """ return event type for press of held_ms """
+        if self.hold and held_ms >= HoldButton.T_HOLD:
+            return HoldButton.HOLD
+        return Button.CLICK
+
+
+class ExpanderButtonGroup(ButtonGroup):
+    """
+        ExpanderButton objects on one or more expander chips
+        - chips: objects with read() returning 16 pin levels
+        - scan statistics: n_scans, scan_us_max, scan_us_total
+    """
+
+    SCAN_MS = const(10)  # ms: press latency is at most 2 scans
+    NONE = const(0xff)
+
+    def __init__(self, chips, button_set, bus_):
+        super().__init__(button_set, bus_)
+        self.chips = chips
+        n = len(chips)
+        self._last = array('H', [0xffff] * n)  # previous raw levels
+        self._state = array('H', [0xffff] * n)  # debounced levels
+        self._mask = array('H', [0] * n)  # bits with buttons
+        # (chip, bit) -> button index
+        self._btn = bytearray([self.NONE] * (n * 16))
+        for i, b in enumerate(button_set):
+            self._btn[b.chip * 16 + b.bit] = i
+            self._mask[b.chip] |= 1 << b.bit
+        self._press_t = array('i', [0] * len(button_set))
+        self.n_scans = 0
+        self.scan_us_max = 0
+        self.scan_us_total = 0
+
+    def _changed(self, chip, diff, levels, now):
+        """ publish events for debounced changes in diff """
+        for bit in range(16):
+            if diff >> bit & 1:
+                index = self._btn[chip * 16 + bit]
+                if levels >> bit & 1:  # released
+                    btn = self.button_set[index]
+                    ev_type = btn.classify(ticks_diff(now, self._press_t[index]))
+                    self.bus.publish_nowait(self.TOPIC, btn.name + ev_type)
+                else:
+                    self._press_t[index] = now
+
+    def scan_once(self):
+        """ read all chips; return True if any input changed """
+        t_0 = ticks_us()
+        now = ticks_ms()
+        changed = False
+        for c, chip in enumerate(self.chips):
+            raw = chip.read() & self._mask[c] | ~self._mask[c] & 0xffff
+            agree = ~(raw ^ self._last[c]) & 0xffff
+            self._last[c] = raw
+            state = self._state[c]
+            levels = state & ~agree | raw & agree
+            diff = levels ^ state
+            if diff:
+                self._state[c] = levels
+                self._changed(c, diff, levels, now)
+                changed = True
+        t_us = ticks_diff(ticks_us(), t_0)
+        self.n_scans += 1
+        self.scan_us_total += t_us
+        if t_us > self.scan_us_max:
+            self.scan_us_max = t_us
+        return changed
+
+    async def scan(self):
+        """ coro: single task for all chips """
+        while True:
+            self.scan_once()
+            await asyncio.sleep_ms(self.SCAN_MS)
+
+    def poll_buttons(self):
+        """ start the scan task """
+        for c, chip in enumerate(self.chips):
+            self._last[c] = self._state[c] = chip.read() | ~self._mask[c] & 0xffff
+        asyncio.create_task(self.scan())
+
+    def scan_stats(self):
+        """ return (n_scans, mean us, max us) """
+        return (self.n_scans, self.scan_us_total // max(self.n_scans, 1),
+                self.scan_us_max)
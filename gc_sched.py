@@ -0,0 +1,98 @@
+# gc_sched.py
+"""
+    Garbage-collection scheduling: collect in frame slack, not mid-frame
+
+    - after_write() is called by the render loop after each strip write:
+        if a collection is due, and the longest pause so far fits in the
+        time left to the next frame deadline, it collects there
+    - idle() is a task that collects when due and no frame has been
+        written for a frame period: states that are not animating
+    - due: bytes allocated since the last collection reach trigger;
+        trigger is half the heap free after a collection, and
+        gc.threshold() is set to three-quarters of it, so that the
+        allocator collects only if a burst outruns the schedule
+    - a collection is forced, slack or not, if gc.mem_free() < low_free
+    - stats: pause times in a profiler.Histogram; collections that ran
+        past the frame deadline; automatic collections, seen as a drop
+        in gc.mem_alloc() that was not scheduled
+"""
+
+import asyncio
+import gc
+
+from time import ticks_us, ticks_diff
+from profiler import Histogram
+
+
+class GcScheduler:
+    """ schedule collections in the time between frames """
+
+    def __init__(self, frame_ms, low_free=8 * 1024, idle_ms=500):
+        self.frame_us = frame_ms * 1000
+        self.low_free = low_free
+        self.idle_ms = idle_ms
+        self.collect = gc.collect  # replaced by Profiler.install() to time it
+        self.pauses = Histogram('gc pause')
+        self.n_late = 0  # collections that ended after the frame deadline
+        self.n_auto = 0  # collections not scheduled here
+        self.n_forced = 0
+        self.trigger = 0
+        self._alloc_0 = 0  # after the last scheduled collection
+        self._alloc = 0  # at the last check
+        self._t_write = ticks_us()
+        self._adapt()
+
+    def _adapt(self):
+        """ set trigger and gc.threshold from free heap """
+        free = max(gc.mem_free(), 0)
+        self.trigger = free // 2
+        gc.threshold(free * 3 // 4 if free else -1)  # -1: off
+        self._alloc_0 = gc.mem_alloc()
+        self._alloc = self._alloc_0
+
+    def _due(self):
+        """ return True if a collection is due; count automatic ones """
+        alloc = gc.mem_alloc()
+        if alloc < self._alloc:
+            self.n_auto += 1
+            self._alloc_0 = alloc
+        self._alloc = alloc
+        return alloc - self._alloc_0 >= self.trigger
+
+    def _run(self):
+        """ collect; return pause in us """
+        t_0 = ticks_us()
+        self.collect()
+        pause = ticks_diff(ticks_us(), t_0)
+        self.pauses.add(pause)
+        self._adapt()
+        return pause
+
+    def after_write(self, t_frame):
+        """ frame written at ticks_us() t_frame: collect in slack if due;
+            collect now if free heap is below low_free
+        """
+        self._t_write = t_frame
+        due = self._due()  # also counts automatic collections
+        if gc.mem_free() < self.low_free:
+            self.n_forced += 1  # low heap: not due, or no slack
+        elif not due:
+            return
+        elif self.pauses.max_us >= self.frame_us - ticks_diff(ticks_us(), t_frame):
+            return  # try after the next frame
+        self._run()
+        if ticks_diff(ticks_us(), t_frame) > self.frame_us:
+            self.n_late += 1
+
+    async def idle(self):
+        """ coro: collect when due and frames are not being written """
+        while True:
+            await asyncio.sleep_ms(self.idle_ms)
+            if ticks_diff(ticks_us(), self._t_write) > self.frame_us and self._due():
+                self._run()
+
+    def summary(self):
+        """ return one-line summary """
+        return (f'{self.pauses.summary()} late {self.n_late} '
+                f'forced {self.n_forced} auto {self.n_auto} '
+                f'trigger {self.trigger}')
@@ -0,0 +1,127 @@
+# host/__init__.py
+"""
+    Run the lighting code on a host (CPython) for testing and measurement
+
+    install() must be called before any project module is imported:
+    - machine, rp2 and micropython modules are replaced by stand-ins
+    - MicroPython time and asyncio extensions are added:
+        time.ticks_ms, ticks_us, ticks_diff, ticks_add, sleep_ms;
+        asyncio.sleep_ms, wait_for_ms, ThreadSafeFlag;
+        gc.mem_alloc, mem_free: tracemalloc bytes, if tracing, in HEAP;
+        gc.threshold
+    - const() is added to builtins, as MicroPython allows
+    Time is real (perf_counter) except inside vloop.run(), where it is virtual.
+"""
+
+import asyncio
+import builtins
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# project modules are in the parent directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+clock = None  # active vloop.VirtualClock, or None for real time
+HEAP = 192 * 1024  # RP2040 MicroPython heap, approximately
+
+
+def ticks_us():
+    if clock is not None:
+        return clock.us
+    return int(time.perf_counter() * 1_000_000)
+
+
+def ticks_ms():
+    return ticks_us() // 1000
+
+
+def ticks_diff(t_1, t_0):
+    return t_1 - t_0
+
+
+def ticks_add(t_0, delta):
+    return t_0 + delta
+
+
+def sleep_ms(ms):
+    """ blocking sleep: virtual time advances without delay """
+    if clock is not None:
+        clock.advance(ms / 1000)
+    else:
+        time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    sleep_ms(us / 1000)
+
+
+def async_sleep_ms(ms):
+    return asyncio.sleep(ms / 1000)
+
+
+def wait_for_ms(aw, ms):
+    return asyncio.wait_for(aw, ms / 1000)
+
+
+def mem_alloc():
+    """ gc.mem_alloc: bytes traced by tracemalloc; 0 if not tracing """
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+def mem_free():
+    return HEAP - mem_alloc()
+
+
+_threshold = -1
+
+
+def threshold(amount=None):
+    """ gc.threshold: the value is kept; CPython collects by object count """
+    global _threshold
+    if amount is None:
+        return _threshold
+    _threshold = amount
+
+
+class ThreadSafeFlag:
+    """ asyncio.ThreadSafeFlag: wait() returns once set, then clears """
+
+    def __init__(self):
+        self._ev = asyncio.Event()
+
+    def set(self):
+        self._ev.set()
+
+    def clear(self):
+        self._ev.clear()
+
+    async def wait(self):
+        await self._ev.wait()
+        self._ev.clear()
+
+
+def install():
+    """ install stand-in modules and MicroPython extensions """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from host import micropython
+    sys.modules['micropython'] = micropython
+    builtins.const = micropython.const
+    from host import machine, rp2
+    sys.modules['machine'] = machine
+    sys.modules['rp2'] = rp2
+    time.ticks_us = ticks_us
+    time.ticks_ms = ticks_ms
+    time.ticks_diff = ticks_diff
+    time.ticks_add = ticks_add
+    time.sleep_ms = sleep_ms
+    time.sleep_us = sleep_us
+    asyncio.sleep_ms = async_sleep_ms
+    asyncio.wait_for_ms = wait_for_ms
+    asyncio.ThreadSafeFlag = ThreadSafeFlag
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+    gc.threshold = threshold
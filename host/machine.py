@@ -0,0 +1,143 @@
+# machine.py
+""" host stand-in for the MicroPython machine module """
+
+from micropython import const
+
+
+def freq(*args):
+    """ processor frequency: RP2040 default """
+    return 125_000_000
+
+
+class Pin:
+    """ GPIO pin; input level is set by set_level() for simulation
+        - Pin objects for the same id share level and IRQ handler
+    """
+    IN = const(0)
+    OUT = const(1)
+    PULL_UP = const(1)
+    PULL_DOWN = const(2)
+    IRQ_FALLING = const(4)
+    IRQ_RISING = const(8)
+
+    _state = {}  # id: [level, handler, trigger]
+
+    def __init__(self, id_, mode=-1, pull=-1, value=None):
+        self.id = id_
+        if id_ not in Pin._state:
+            Pin._state[id_] = [1 if pull == self.PULL_UP else 0, None, 0]
+        self._s = Pin._state[id_]
+        if value is not None:
+            self._s[0] = 1 if value else 0
+
+    def __repr__(self):
+        return f'Pin({self.id})'
+
+    def value(self, v=None):
+        if v is None:
+            return self._s[0]
+        self._s[0] = 1 if v else 0
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self._s[1] = handler
+        self._s[2] = trigger
+
+    def set_level(self, v):
+        """ simulation: set input level and run irq handler on an edge """
+        v = 1 if v else 0
+        if v == self._s[0]:
+            return
+        self._s[0] = v
+        edge = self.IRQ_RISING if v else self.IRQ_FALLING
+        if self._s[1] and self._s[2] & edge:
+            self._s[1](self)
+
+    @classmethod
+    def reset(cls):
+        """ simulation: forget all pin states """
+        cls._state = {}
+
+
+class Signal:
+    """ Pin wrapper with optional inversion """
+
+    def __init__(self, pin, *args, invert=False, **kwargs):
+        if not isinstance(pin, Pin):
+            pin = Pin(pin, *args)
+        self.pin = pin
+        self.invert = invert
+
+    def value(self, v=None):
+        if v is None:
+            return self.pin.value() ^ self.invert
+        self.pin.value(v ^ self.invert)
+
+
+class PWM:
+    """ PWM output: duty_u16 value is stored """
+
+    def __init__(self, pin, freq=1000, duty_u16=0):
+        self.pin = pin
+        self._freq = freq
+        self._duty = duty_u16
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+
+
+class I2C:
+    """ I2C bus: transactions and bytes are counted
+        - devices: address: object; an object may implement
+            write(reg, data), read(reg, n) to simulate a device
+        - reg is None for writeto() and readfrom()
+    """
+
+    devices = {}
+
+    def __init__(self, id_, sda=None, scl=None, freq=400_000):
+        self.id = id_
+        self.n_trans = 0
+        self.n_bytes = 0
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def _write(self, addr, reg, buf):
+        self.n_trans += 1
+        self.n_bytes += len(buf) + (reg is not None)
+        device = self.devices.get(addr)
+        if device is not None:
+            device.write(reg, bytes(buf, 'utf-8') if isinstance(buf, str) else bytes(buf))
+
+    def _read(self, addr, reg, n):
+        self.n_trans += 1
+        self.n_bytes += n + (reg is not None)
+        device = self.devices.get(addr)
+        if device is None:
+            raise OSError(19)  # ENODEV
+        return device.read(reg, n)
+
+    def writeto(self, addr, buf):
+        self._write(addr, None, buf)
+
+    def writeto_mem(self, addr, reg, buf):
+        self._write(addr, reg, buf)
+
+    def readfrom(self, addr, n):
+        return self._read(addr, None, n)
+
+    def readfrom_mem(self, addr, reg, n):
+        return self._read(addr, reg, n)
+
+    def readfrom_into(self, addr, buf):
+        buf[:] = self._read(addr, None, len(buf))
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        buf[:] = self._read(addr, reg, len(buf))
@@ -0,0 +1,23 @@
+# micropython.py
+""" host stand-in for the MicroPython micropython module """
+
+import asyncio
+
+
+def const(value):
+    """ constant: value is returned unchanged """
+    return value
+
+
+def schedule(fn, arg):
+    """ run fn(arg) soon in the main context """
+    try:
+        asyncio.get_running_loop().call_soon(fn, arg)
+    except RuntimeError:  # no running loop
+        fn(arg)
+    return True
+
+
+def opt_level(level=None):
+    """ optimisation level: host runs at 0 """
+    return 0
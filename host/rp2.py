@@ -0,0 +1,48 @@
+# rp2.py
+""" host stand-in for the MicroPython rp2 module """
+
+import time
+
+from micropython import const
+
+
+class PIO:
+    OUT_LOW = const(0)
+    OUT_HIGH = const(1)
+    SHIFT_LEFT = const(0)
+    SHIFT_RIGHT = const(1)
+
+
+def asm_pio(**kwargs):
+    """ decorator: the PIO program is not assembled """
+    def decorator(program):
+        return program
+    return decorator
+
+
+class StateMachine:
+    """ PIO state machine: put() calls on_put(arr, shift) if set
+        - wire_us: if set, put() blocks for wire_us per word, in real
+            time, as a full TX FIFO blocks; WS2812 at 800kHz: 30us
+    """
+
+    on_put = None
+    wire_us = 0
+
+    def __init__(self, id_, program=None, freq=None, **kwargs):
+        self.id = id_
+        self.n_puts = 0
+        self._active = False
+
+    def active(self, value=None):
+        if value is None:
+            return self._active
+        self._active = bool(value)
+
+    def put(self, value, shift=0):
+        self.n_puts += 1
+        if StateMachine.on_put:
+            StateMachine.on_put(value, shift)
+        if StateMachine.wire_us:
+            n_words = 1 if isinstance(value, int) else len(value)
+            time.sleep(n_words * StateMachine.wire_us / 1_000_000)
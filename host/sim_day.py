@@ -0,0 +1,196 @@
+# sim_day.py
+"""
+    Run LightingSystem through virtual days on the host, in simulated time
+
+    python -m host.sim_day [--hours 24] [--t_mpy 72] [--save FILE] [--compare [FILE]]
+                           [--profile] [--lag]
+
+    - every strip write (frame) and every zone transition is recorded
+        with its time in ms since the start of the run
+    - console output is captured, not printed
+    - button events, as 'B1' or 'U2', are pressed on the board pins at
+        virtual minutes from the start: click 100ms, hold 1000ms
+    - --save writes the recording summary as JSON; --compare checks
+        a run against a saved summary and reports the first differences;
+        host/sim_day_baseline.json, the default, is a 24h run at t_mpy 72
+    - --profile installs profiler.Profiler and prints its summary;
+        span times are virtual, so only deadline misses and counts
+        are meaningful
+    - --lag installs loop_lag.LoopLag and prints the worst lags; only
+        blocking time.sleep_ms() calls advance virtual time, so these
+        are the lags found
+"""
+
+import host
+host.install()
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from binascii import crc32
+
+from host import vloop
+from host.machine import I2C, Pin
+from host.rp2 import StateMachine
+
+from lcd_1602 import LcdApi
+from lighting_zone import LightingZone
+from loop_lag import LoopLag
+from pixel_strip import PixelStrip
+from plasma_system import LightingSystem, DriverBoard
+from profiler import Profiler
+from ws2812 import Ws2812
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sim_day_baseline.json')
+
+
+class Recording:
+    """ frames and transitions of a simulated run """
+
+    def __init__(self):
+        self.frames = []  # (t_ms, frame crc32)
+        self.transitions = []  # (t_ms, zone, from_state, to_state)
+        self.console = ''
+        self.real_s = 0.0
+        self.lcd_trans = 0  # LCD I2C transactions
+        self.lcd_bytes = 0
+        self.profile = []  # Profiler summary lines
+        self.lag = []  # LoopLag worst (lag_us, tag)
+
+    def on_put(self, arr, shift):
+        """ StateMachine.put hook: record frame """
+        self.frames.append((time.ticks_ms(), crc32(bytes(arr))))
+
+    def summary(self):
+        """ return JSON-serialisable summary """
+        return {
+            'n_frames': len(self.frames),
+            'frames': self.frames,
+            'transitions': self.transitions,
+            'digest': crc32(json.dumps([self.frames, self.transitions]).encode())
+        }
+
+    def compare(self, other):
+        """ return list of differences against another summary """
+        diffs = []
+        mine = self.summary()
+        if mine['digest'] == other['digest']:
+            return diffs
+        for i, (a, b) in enumerate(zip(mine['transitions'], other['transitions'])):
+            if list(a) != list(b):
+                diffs.append(f'transition {i}: {a} != {b}')
+                break
+        if len(mine['transitions']) != len(other['transitions']):
+            diffs.append(f"transitions: {len(mine['transitions'])} != {len(other['transitions'])}")
+        for i, (a, b) in enumerate(zip(mine['frames'], other['frames'])):
+            if list(a) != list(b):
+                diffs.append(f'frame {i}: {a} != {b}')
+                break
+        if mine['n_frames'] != other['n_frames']:
+            diffs.append(f"frames: {mine['n_frames']} != {other['n_frames']}")
+        return diffs
+
+
+async def _press(board, event):
+    """ coro: press and release a button pin for event """
+    pin = Pin(board.buttons[event[0]])
+    pin.set_level(0)
+    await asyncio.sleep_ms(1000 if event[1] == '2' else 100)
+    pin.set_level(1)
+
+
+async def _run(hours, t_mpy, n_pixels, events, zones, rec, profile, lag):
+    """ coro: build the system and run it for hours of virtual time """
+    board = DriverBoard()
+    nps = PixelStrip(Ws2812(board.strip_pins['dat']), n_pixels)
+    lcd = LcdApi(board.i2c_pins)
+    kwargs = {'t_mpy': t_mpy, 'state_def': LightingSystem.state_def}
+    if zones:
+        kwargs['zones'] = zones
+    system = LightingSystem(board, nps, lcd, **kwargs)
+    if profile:
+        Profiler().install(system)
+    if lag:
+        LoopLag().install(system)
+    m_ms = system.v_clock.m_ms
+    asyncio.create_task(system.run_system())
+    t_0 = time.ticks_ms()
+    for v_m, event in events:
+        await asyncio.sleep_ms(max(time.ticks_diff(t_0 + v_m * m_ms, time.ticks_ms()), 0))
+        await _press(board, event)
+    await asyncio.sleep_ms(max(time.ticks_diff(t_0 + hours * 60 * m_ms, time.ticks_ms()), 0))
+    rec.lcd_trans = lcd.i2c.n_trans
+    rec.lcd_bytes = lcd.i2c.n_bytes
+    if profile:
+        rec.profile = system.profiler.lines()
+    if lag:
+        rec.lag = system.loop_lag.worst()
+    return system
+
+
+def run_day(hours=24, t_mpy=72, n_pixels=238, events=((1, 'B1'),), zones=None,
+            profile=False, lag=False):
+    """ run the system in virtual time; return Recording """
+    rec = Recording()
+    transition = LightingZone.transition
+
+    async def record_transition(zone, state_id):
+        rec.transitions.append(
+            (time.ticks_ms(), zone.name, zone.state.name, zone.table.states[state_id]))
+        await transition(zone, state_id)
+
+    LightingZone.transition = record_transition
+    Pin.reset()
+    StateMachine.on_put = rec.on_put
+    I2C.devices = {LcdApi.I2C_ADDR: None}
+    out = io.StringIO()
+    t_real = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(out):
+            vloop.run(_run(hours, t_mpy, n_pixels, events, zones, rec, profile, lag))
+    finally:
+        LightingZone.transition = transition
+        StateMachine.on_put = None
+        I2C.devices = {}
+    rec.real_s = time.perf_counter() - t_real
+    rec.console = out.getvalue()
+    return rec
+
+
+def main():
+    parser = argparse.ArgumentParser(description='simulated-time run of LightingSystem')
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--t_mpy', type=int, default=72)
+    parser.add_argument('--save', help='write run summary as JSON')
+    parser.add_argument('--compare', nargs='?', const=BASELINE,
+                        help='compare run with saved JSON summary; default: host/sim_day_baseline.json')
+    parser.add_argument('--profile', action='store_true', help='print profiler summary')
+    parser.add_argument('--lag', action='store_true', help='print worst loop lags')
+    args = parser.parse_args()
+    rec = run_day(args.hours, args.t_mpy, profile=args.profile, lag=args.lag)
+    print(f'{args.hours}h virtual in {rec.real_s:.3f}s real: '
+          f'{len(rec.frames)} frames, {len(rec.transitions)} transitions; '
+          f'LCD I2C: {rec.lcd_trans} transactions, {rec.lcd_bytes} bytes')
+    for t_ms, zone, s_0, s_1 in rec.transitions:
+        print(f'  {t_ms:>10}ms {zone}: {s_0} -> {s_1}')
+    for line in rec.profile:
+        print(f'  {line}')
+    for lag_us, tag in rec.lag:
+        print(f'  loop lag {lag_us:>8}us {tag}')
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(rec.summary(), f)
+    if args.compare:
+        with open(args.compare) as f:
+            diffs = rec.compare(json.load(f))
+        print('runs match' if not diffs else '\n'.join(diffs))
+        return 1 if diffs else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+# sim_dual.py
+"""
+    Single- and dual-core strip-write throughput, in real time, with
+    CPython threads standing in for the RP2040 cores
+
+    python -m host.sim_dual [--frames 200] [--pixels 238] [--work 20] [--wire_us 30]
+
+    - each frame is rendered by work passes of set_strip_lin over the
+        strip: CPython is much faster than MicroPython, so a frame is
+        rendered several times to give a comparable render time
+    - StateMachine.put blocks for wire_us per pixel, as the PIO does
+    - single: render, then write: core 0 waits for the put
+    - dual: render, then hand off to dual_core.DualCoreWriter; core 0
+        waits only while the previous frame has not been taken
+    - reported: frames written per second, and core-0 busy time per
+        frame: the time that asyncio tasks could not run
+"""
+
+import host
+host.install()
+
+import argparse
+import time
+
+from host.rp2 import StateMachine
+
+from dual_core import DualCoreWriter
+from pixel_strip import PixelStrip
+from ws2812 import Ws2812
+
+
+def _render(nps, frame, work):
+    """ set every pixel work times: stand-in for effect rendering """
+    for i in range(work):
+        nps.set_strip_lin(((frame + i) & 0xff, 100, 50))
+
+
+def run_single(nps, frames, work):
+    """ return (frames/s, core-0 busy ms per frame) """
+    t_0 = time.perf_counter()
+    for frame in range(frames):
+        _render(nps, frame, work)
+        nps.write()
+    t = time.perf_counter() - t_0
+    return frames / t, t * 1000 / frames
+
+
+def run_dual(nps, frames, work):
+    """ return (frames/s, core-0 busy ms per frame, writer) """
+    writer = DualCoreWriter(nps.driver, nps.n_pixels)
+    writer.install(nps)
+    busy = 0.0
+    t_0 = time.perf_counter()
+    for frame in range(frames):
+        t_b = time.perf_counter()
+        _render(nps, frame, work)
+        nps.write()
+        busy += time.perf_counter() - t_b
+        while writer.ready:  # back-pressure: one frame in hand
+            time.sleep_us(50)
+    while writer.n_written < writer.n_submitted - writer.n_dropped:
+        time.sleep_us(50)
+    t = time.perf_counter() - t_0
+    writer.stop()
+    return frames / t, busy * 1000 / frames, writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='single- and dual-core write throughput')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--pixels', type=int, default=238)
+    parser.add_argument('--work', type=int, default=20)
+    parser.add_argument('--wire_us', type=int, default=30)
+    args = parser.parse_args()
+    StateMachine.wire_us = args.wire_us
+    try:
+        nps = PixelStrip(Ws2812(15), args.pixels)
+        fps, busy = run_single(nps, args.frames, args.work)
+        print(f'single: {fps:7.1f} frames/s; core 0 busy {busy:6.2f} ms/frame')
+        nps = PixelStrip(Ws2812(15), args.pixels)
+        fps, busy, writer = run_dual(nps, args.frames, args.work)
+        print(f'dual:   {fps:7.1f} frames/s; core 0 busy {busy:6.2f} ms/frame; '
+              f'{writer.summary()}')
+    finally:
+        StateMachine.wire_us = 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+# sim_expander.py
+"""
+    Simulated I2C expanders, and a scan-rate and latency run of
+    expander.ExpanderButtonGroup in simulated time
+
+    python -m host.sim_expander [--buttons 32] [--presses 200] [--seed 1]
+
+    - SimPcf8575, SimMcp23017: I2C.devices objects; press(bit) and
+        release(bit) set pin levels as a pulled-up button would
+    - latency is from button release to event receipt by a bus subscriber
+"""
+
+import host
+host.install()
+
+import argparse
+import asyncio
+import random
+import time
+
+from host import vloop
+from host.machine import I2C
+
+from buttons import ButtonGroup
+from expander import Pcf8575, Mcp23017, ExpanderButton, ExpanderButtonGroup
+from queue import EventBus
+
+
+class SimExpander:
+    """ 16 pulled-up input pins """
+
+    def __init__(self):
+        self.levels = 0xffff
+
+    def press(self, bit):
+        self.levels &= ~(1 << bit) & 0xffff
+
+    def release(self, bit):
+        self.levels |= 1 << bit
+
+    def _levels(self, n):
+        return bytes([self.levels & 0xff, self.levels >> 8])[:n]
+
+
+class SimPcf8575(SimExpander):
+    """ PCF8575: writes set the output latch; reads return pin levels """
+
+    def __init__(self):
+        super().__init__()
+        self.latch = 0xffff
+
+    def write(self, reg, data):
+        self.latch = data[0] | data[1] << 8
+
+    def read(self, reg, n):
+        return self._levels(n)
+
+
+class SimMcp23017(SimExpander):
+    """ MCP23017: sequential registers; GPIO reads return pin levels """
+
+    def __init__(self):
+        super().__init__()
+        self.regs = bytearray(0x16)
+
+    def write(self, reg, data):
+        self.regs[reg:reg + len(data)] = data
+
+    def read(self, reg, n):
+        if reg == Mcp23017.GPIOA:
+            return self._levels(n)
+        return bytes(self.regs[reg:reg + n])
+
+
+async def _run(n_buttons, n_presses, seed, result):
+    """ coro: press random buttons; collect events with receipt times """
+    sims = [SimMcp23017(), SimPcf8575()]
+    I2C.devices = {0x20: sims[0], 0x21: sims[1]}
+    i2c = I2C(0)
+    chips = [Mcp23017(i2c, 0x20), Pcf8575(i2c, 0x21)]
+    button_set = tuple([ExpanderButton(i // 16, i % 16, f'K{i}', hold=i % 2 == 1)
+                        for i in range(n_buttons)])
+    bus = EventBus()
+    events = bus.subscribe((ButtonGroup.TOPIC,), length=64)
+    group = ExpanderButtonGroup(chips, button_set, bus)
+    group.poll_buttons()
+    n_trans_0 = i2c.n_trans
+
+    released = {}  # name: (release ms, expected event)
+
+    async def receive():
+        while True:
+            event = await events.get()
+            t_release, expected = released.pop(event[:-1])
+            result['latency'].append(time.ticks_diff(time.ticks_ms(), t_release))
+            result['errors'] += event != expected
+
+    asyncio.create_task(receive())
+    rnd = random.Random(seed)
+    t_0 = time.ticks_ms()
+    for _ in range(n_presses):
+        btn = button_set[rnd.randrange(n_buttons)]
+        held = rnd.randrange(50, 1500)
+        sim = sims[btn.chip]
+        sim.press(btn.bit)
+        await asyncio.sleep_ms(held)
+        sim.release(btn.bit)
+        released[btn.name] = (time.ticks_ms(), btn.name + btn.classify(held))
+        await asyncio.sleep_ms(rnd.randrange(50, 300))
+    await asyncio.sleep_ms(100)
+    result['run_ms'] = time.ticks_diff(time.ticks_ms(), t_0)
+    result['n_scans'] = group.n_scans
+    result['n_trans'] = i2c.n_trans - n_trans_0
+    result['missed'] = len(released)
+
+
+def run(n_buttons=32, n_presses=200, seed=1):
+    """ run in simulated time; return result dict """
+    result = {'latency': [], 'errors': 0}
+    t_real = time.perf_counter()
+    try:
+        vloop.run(_run(n_buttons, n_presses, seed, result))
+    finally:
+        I2C.devices = {}
+    result['real_s'] = time.perf_counter() - t_real
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='simulated expander button scan')
+    parser.add_argument('--buttons', type=int, default=32)
+    parser.add_argument('--presses', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    r = run(args.buttons, args.presses, args.seed)
+    lat = r['latency']
+    print(f"{args.buttons} buttons, {args.presses} presses, "
+          f"{r['run_ms'] / 1000:.1f}s virtual in {r['real_s']:.3f}s real")
+    print(f"scans: {r['n_scans']} at {r['n_scans'] * 1000 / r['run_ms']:.1f}/s; "
+          f"I2C transactions: {r['n_trans']}; "
+          f"host cost: {r['real_s'] * 1e6 / r['n_scans']:.1f}us/scan")
+    print(f"latency ms: mean {sum(lat) / max(len(lat), 1):.1f}, "
+          f"max {max(lat, default=0)}; "
+          f"events: {len(lat)}, wrong: {r['errors']}, missed: {r['missed']}")
+    return 1 if r['errors'] or r['missed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
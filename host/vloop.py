@@ -0,0 +1,84 @@
+# vloop.py
+"""
+    Deterministic simulated-time asyncio event loop
+    - the selector never blocks: select(timeout) advances virtual time
+        by timeout, so the loop jumps straight to the next timer
+    - time.ticks_ms() etc. read virtual time while run() is active
+    - blocking time.sleep_ms() advances virtual time
+"""
+
+import asyncio
+import selectors
+
+import host
+
+
+class Deadlock(RuntimeError):
+    """ no ready callbacks and no timers: nothing can ever run """
+
+
+class VirtualClock:
+    """ virtual time in integer microseconds """
+
+    def __init__(self, start_us=0):
+        self.us = start_us
+
+    def advance(self, seconds):
+        """ advance by seconds, rounded up to the next us """
+        self.us += -(-round(seconds * 1e9) // 1000)
+
+    def time(self):
+        return self.us / 1_000_000
+
+
+class VirtualSelector(selectors.BaseSelector):
+    """ selector that advances virtual time instead of waiting """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._map = {}
+
+    def register(self, fileobj, events, data=None):
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        key = selectors.SelectorKey(fileobj, fd, events, data)
+        self._map[fd] = key
+        return key
+
+    def unregister(self, fileobj):
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        return self._map.pop(fd)
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise Deadlock('no timers pending')
+        if timeout > 0:
+            self.clock.advance(timeout)
+        return []
+
+    def get_map(self):
+        return self._map
+
+    def close(self):
+        self._map.clear()
+
+
+class VirtualLoop(asyncio.SelectorEventLoop):
+    """ event loop running on a VirtualClock """
+
+    def __init__(self, clock):
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.time()
+
+
+def run(coro, clock=None):
+    """ run coro to completion in virtual time; return its result """
+    clock = clock or VirtualClock()
+    host.clock = clock
+    try:
+        with asyncio.Runner(loop_factory=lambda: VirtualLoop(clock)) as runner:
+            return runner.run(coro)
+    finally:
+        host.clock = None
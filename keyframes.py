@@ -0,0 +1,225 @@
+# keyframes.py
+"""
+    Keyframe timeline and fade engine for lighting states
+
+    Track:
+    - list of (virtual-minute, HSV) keyframes; minutes relative to track start
+    - HSV values interpolated between keyframes with an easing function
+    - keyframes are converted to fixed point once: interpolation, easing
+        and HSV to RGB are integer, into a caller's buffer: no allocation
+        per step
+    FadeEngine:
+    - plays a track on a fixed grid of steps_per_m steps per virtual minute
+    - looks ahead for the next step at which the strip output changes and
+        sleeps until that step in one sleep: unchanged steps cost no
+        wake-up and no write
+    - output is compared after calibration: encode(rgb), e.g.
+        PixelStrip.encode_lin, so that steps the calibration tables map
+        to the same colour are not written
+    - current and look-ahead RGB are two preallocated bytearrays
+    - writes and saved (writes avoided against a write per step) are
+        reported for the last track played
+"""
+
+import asyncio
+from array import array
+from time import ticks_ms, ticks_add, ticks_diff
+
+from micropython import const
+
+F_BITS = const(10)
+F_ONE = const(1 << F_BITS)  # fixed-point 1.0: fractions, saturation, hue sector
+V_BITS = const(4)  # value: 8-bit level << V_BITS
+V_ONE = const(255 << V_BITS)
+
+
+def ease_linear(f):
+    """ no easing; f: 0 to F_ONE """
+    return f
+
+
+def ease_in(f):
+    """ quadratic: slow start """
+    return f * f >> F_BITS
+
+
+def ease_out(f):
+    """ quadratic: slow finish """
+    return f * (2 * F_ONE - f) >> F_BITS
+
+
+def ease_in_out(f):
+    """ smoothstep: slow start and finish """
+    return (f * f >> F_BITS) * (3 * F_ONE - 2 * f) >> F_BITS
+
+
+EASING = {
+    'linear': ease_linear,
+    'in': ease_in,
+    'out': ease_out,
+    'in_out': ease_in_out
+}
+
+
+def hsv_rgb_into(h, s, v, out):
+    """ fixed-point HSV to 8-bit RGB in out[0:3]: as ColourSpace.hsv_rgb
+        - h: 0 to 6 * F_ONE, F_ONE per 60-degree sector; s: 0 to F_ONE;
+            v: 0 to V_ONE
+    """
+    if h >= 6 * F_ONE:
+        h = 0
+    i = h >> F_BITS
+    f = h & (F_ONE - 1)
+    p = v * (F_ONE - s) >> F_BITS >> V_BITS
+    q = v * (F_ONE - (s * f >> F_BITS)) >> F_BITS >> V_BITS
+    t = v * (F_ONE - (s * (F_ONE - f) >> F_BITS)) >> F_BITS >> V_BITS
+    v >>= V_BITS
+    # select colour sector
+    if i == 0:
+        out[0] = v
+        out[1] = t
+        out[2] = p
+    elif i == 1:
+        out[0] = q
+        out[1] = v
+        out[2] = p
+    elif i == 2:
+        out[0] = p
+        out[1] = v
+        out[2] = t
+    elif i == 3:
+        out[0] = p
+        out[1] = q
+        out[2] = v
+    elif i == 4:
+        out[0] = t
+        out[1] = p
+        out[2] = v
+    else:
+        out[0] = v
+        out[1] = p
+        out[2] = q
+
+
+class Track:
+    """ HSV keyframes against virtual minutes
+        - HSV: H float 0.0 to 360.0; S and V float 0.0 to 1.0
+        - kept in fixed point: see hsv_rgb_into()
+    """
+
+    def __init__(self, keyframes, easing='linear'):
+        self.ease = EASING[easing]
+        self.duration = keyframes[-1][0]
+        self.mins = array('i', [kf[0] for kf in keyframes])
+        self.h = array('i', [int(kf[1][0] * F_ONE / 60.0 + 0.5) for kf in keyframes])
+        self.s = array('i', [int(kf[1][1] * F_ONE + 0.5) for kf in keyframes])
+        self.v = array('i', [int(kf[1][2] * V_ONE + 0.5) for kf in keyframes])
+
+    def rgb_into(self, out, num, den=1):
+        """ set linear 8-bit RGB in out at num / den virtual minutes
+            from track start; no allocation
+        """
+        mins = self.mins
+        last = len(mins) - 1
+        if num <= mins[0] * den:
+            i = 0
+            f = 0
+        elif num >= mins[last] * den:
+            i = last
+            f = 0
+        else:
+            i = 1
+            while num >= mins[i] * den:
+                i += 1
+            i -= 1  # between keyframes i and i + 1
+            f = self.ease(((num - mins[i] * den) << F_BITS)
+                          // ((mins[i + 1] - mins[i]) * den))
+        h = self.h[i]
+        s = self.s[i]
+        v = self.v[i]
+        if f:
+            h += (self.h[i + 1] - h) * f >> F_BITS
+            s += (self.s[i + 1] - s) * f >> F_BITS
+            v += (self.v[i + 1] - v) * f >> F_BITS
+        hsv_rgb_into(h, s, v, out)
+
+
+def rgb_u24(rgb):
+    """ return linear RGB packed as an int: default FadeEngine encode """
+    return rgb[0] << 16 | rgb[1] << 8 | rgb[2]
+
+
+class FadeEngine:
+    """ play tracks: write only when the encoded output changes
+        - encode(rgb): the value written for rgb; with calibration
+            segments, PixelStrip.encode_lin compares the profile tables
+        - on_write(step, n_steps, rgb), if given, is called after each
+            write; ints, so that progress needs no float; rgb is the
+            engine's buffer: valid until the next step
+    """
+
+    def __init__(self, set_lin, write, steps_per_m=5, on_write=None, encode=rgb_u24):
+        self.set_lin = set_lin
+        self.write = write
+        self.on_write = on_write
+        self.encode = encode
+        self.steps_per_m = steps_per_m
+        self.steps = 0
+        self.reached = 0  # last step played: less than steps if interrupted
+        self.writes = 0
+        self._rgb = bytearray(3)  # output
+        self._next = bytearray(3)  # look-ahead
+
+    @property
+    def saved(self):
+        """ writes avoided in last track, against a write per step played """
+        return self.reached + 1 - self.writes
+
+    async def play(self, track, m_ms, is_active):
+        """ coro: play track while is_active() returns True
+            - m_ms: virtual-minute duration in ms
+            - step deadlines are measured from the start of the track
+            - one sleep to each change of output: on state exit the
+                sleep is cancelled with the state's tasks
+        """
+        steps_per_m = self.steps_per_m
+        encode = self.encode
+        n_steps = track.duration * steps_per_m
+        step_ms = m_ms // steps_per_m
+        self.steps = n_steps
+        self.reached = 0
+        rgb = self._rgb
+        track.rgb_into(rgb, 0)
+        out = encode(rgb)
+        self.set_lin(rgb)
+        self.write()
+        self.writes = 1
+        if self.on_write:
+            self.on_write(0, n_steps, rgb)
+        nxt = self._next
+        t_0 = ticks_ms()
+        step = 0
+        while step < n_steps:
+            # look ahead for next change of output
+            step += 1
+            track.rgb_into(nxt, step, steps_per_m)
+            out_next = encode(nxt)
+            while out_next == out and step < n_steps:
+                step += 1
+                track.rgb_into(nxt, step, steps_per_m)
+                out_next = encode(nxt)
+            await asyncio.sleep_ms(
+                max(ticks_diff(ticks_add(t_0, step * step_ms), ticks_ms()), 0))
+            if not is_active():
+                if step_ms:
+                    self.reached = min(ticks_diff(ticks_ms(), t_0) // step_ms, step)
+                break
+            self.reached = step
+            if out_next != out:
+                out = out_next
+                rgb, nxt = nxt, rgb
+                self.set_lin(rgb)
+                self.write()
+                self.writes += 1
+                if self.on_write:
+                    self.on_write(step, n_steps, rgb)
@@ -9,7 +9,14 @@ from micropython import const
 
 
 class LcdApi:
-    """ drive LCD1602 display """
+    """ drive LCD1602 display
+        - a shadow buffer holds the displayed characters; writes are
+            diffed against it and each run of changed characters is sent
+            as one cursor set and one multi-byte data write
+        - n_trans, n_bytes count I2C transactions and bytes sent
+        - custom glyphs are uploaded to the 8 CGRAM slots on demand;
+            the least-recently used slot not on display is replaced
+    """
 
     # not all constants are used
     I2C_ADDR = const(62)  # I2C Address
@@ -34,6 +41,23 @@ class LcdApi:
     LINES_1 = const(0x00)
     DOTS_5x8 = const(0x00)
 
+    # unchanged characters bridged to join runs: cheaper than a new run
+    RUN_GAP = const(3)
+
+    # custom characters: 8 rows of 5 dots
+    SET_CGRAM = const(0x40)
+    N_SLOTS = const(8)
+    FULL_BLOCK = const(0xff)  # character ROM
+    GLYPHS = {
+        'bar1': b'\x10\x10\x10\x10\x10\x10\x10\x10',
+        'bar2': b'\x18\x18\x18\x18\x18\x18\x18\x18',
+        'bar3': b'\x1c\x1c\x1c\x1c\x1c\x1c\x1c\x1c',
+        'bar4': b'\x1e\x1e\x1e\x1e\x1e\x1e\x1e\x1e',
+        'sun': b'\x00\x15\x0e\x1f\x0e\x15\x00\x00',
+        'moon': b'\x0e\x1c\x18\x18\x18\x1c\x0e\x00'
+    }
+    BARS = ('', 'bar1', 'bar2', 'bar3', 'bar4')  # partial cells: 1-4 columns
+
     def __init__(self, pins_, dim_=(16, 2)):
         i = 0 if pins_['sda'] in (0, 4, 8, 12, 16, 20) else 1
         self.i2c = I2C(i, sda=Pin(pins_['sda']), scl=Pin(pins_['scl']), freq=400_000)
@@ -41,10 +65,21 @@ class LcdApi:
         self._cols = self.dim['cols']
         self._rows = self.dim['rows']
         self._show_fn = self.MODE_4BIT | self.LINES_1 | self.DOTS_5x8
+        self._shadow = bytearray(b' ' * (self._cols * self._rows))
+        self._line = bytearray(self._cols)  # write_line staging
+        self._cursor = bytearray(2)
+        self._bar = bytearray(self._cols)  # write_bar staging
+        self._slot_of = {}  # glyph name: CGRAM slot
+        self._slot_name = [None] * self.N_SLOTS
+        self._lru = []  # slots, least-recently used first
+        self.n_uploads = 0
+        self.n_trans = 0
+        self.n_bytes = 0
+        self.addr = None
         try:
-            # address info only; ADDRESS used in code
             self.addresses = self.i2c.scan()
-            if self.I2C_ADDR not in self.addresses:
+            self.addr = self._find_addr(self.addresses)
+            if self.addr is None:
                 self.lcd_mode = False
                 print(f'Other I2C address found: {self.addresses}')
             else:
@@ -60,23 +95,52 @@ class LcdApi:
         self._show_mode = None
         self.write_delay_ms = 200  # delay between line-writes
 
+    def _find_addr(self, addresses):
+        """ return display address from scan, or None """
+        return self.I2C_ADDR if self.I2C_ADDR in addresses else None
+
+    # transport: all I2C writes to the display
+
     def _command(self, cmd):
         """ invoke command """
-        self.i2c.writeto_mem(self.I2C_ADDR, 0x80, chr(cmd))
+        self.i2c.writeto_mem(self.addr, 0x80, chr(cmd))
+        self.n_trans += 1
+        self.n_bytes += 2
 
     def _set_cursor(self, col, row):
         """ set cursor for write """
-        col |= 0x80 if row == 0 else 0xc0
-        self.i2c.writeto(self.I2C_ADDR, bytearray([0x80, col]))
-
-    def _write(self, data):
-        """ write out character at cursor position """
-        self.i2c.writeto_mem(self.I2C_ADDR, 0x40, chr(data))
-
-    def _write_out(self, arg):
-        """ write out bytearray at cursor position """
-        for b in bytearray(str(arg), 'utf-8'):
-            self.i2c.writeto_mem(self.I2C_ADDR, 0x40, chr(b))
+        self._cursor[0] = 0x80
+        self._cursor[1] = col | (0x80 if row == 0 else 0xc0)
+        self.i2c.writeto(self.addr, self._cursor)
+        self.n_trans += 1
+        self.n_bytes += 2
+
+    def _write_bytes(self, buf):
+        """ write out bytes at cursor position in one transaction """
+        self.i2c.writeto_mem(self.addr, 0x40, buf)
+        self.n_trans += 1
+        self.n_bytes += len(buf) + 1
+
+    def _update(self, col, row, data):
+        """ write data at (col, row): changed runs only; clipped to row """
+        n = min(len(data), self._cols - col)
+        base = row * self._cols + col
+        shadow = self._shadow
+        mv = memoryview(data)
+        i = 0
+        while i < n:
+            if data[i] == shadow[base + i]:
+                i += 1
+                continue
+            start = last = i
+            i += 1
+            while i < n and i - last <= self.RUN_GAP:
+                if data[i] != shadow[base + i]:
+                    last = i
+                i += 1
+            shadow[base + start:base + last + 1] = mv[start:last + 1]
+            self._set_cursor(col + start, row)
+            self._write_bytes(mv[start:last + 1])
 
     def _display(self):
         """ set display ev_type (on) """
@@ -102,18 +166,60 @@ class LcdApi:
         self._show_mode = self.ENT_LEFT | self.ENT_SHIFT_DEC
         self._command(self.ENTRY_MODE | self._show_mode)
 
+    def _on_display(self, code):
+        """ return True if character code is in the shadow buffer """
+        for c in self._shadow:
+            if c == code:
+                return True
+        return False
+
+    def _free_slot(self):
+        """ return unused slot, else LRU slot not on display, else LRU slot """
+        if len(self._lru) < self.N_SLOTS:
+            return len(self._lru)
+        for slot in self._lru:
+            if not self._on_display(slot):
+                return slot
+        return self._lru[0]
+
+    def glyph(self, name):
+        """ return character code for GLYPHS[name]; upload on a miss """
+        slot = self._slot_of.get(name)
+        if slot is None:
+            slot = self._free_slot()
+            if self._slot_name[slot] is not None:
+                del self._slot_of[self._slot_name[slot]]
+            self._slot_name[slot] = name
+            self._slot_of[name] = slot
+            # cells showing the slot change glyph on upload: the shadow
+            # holds codes, so it stays consistent with the display
+            self._command(self.SET_CGRAM | slot << 3)
+            self._write_bytes(self.GLYPHS[name])
+            self.n_uploads += 1
+        if slot in self._lru:
+            self._lru.remove(slot)
+        self._lru.append(slot)
+        return slot
+
     # interface functions
 
     def clear(self):
         if self.lcd_mode:
             self._command(self.CLR_DISP)
             sleep_ms(2)
+            for i in range(len(self._shadow)):
+                self._shadow[i] = 0x20
 
     def write_line(self, row, text):
         """ write text to left-justified display row """
         if self.lcd_mode:
-            self._set_cursor(0, row)
-            self._write_out(f'{text:<16}')
+            data = bytes(str(text), 'utf-8')
+            line = self._line
+            n = min(len(data), self._cols)
+            line[:n] = data[:n]
+            for i in range(n, self._cols):
+                line[i] = 0x20
+            self._update(0, row, line)
         else:
             print(f'{text:<16}')
 
@@ -126,11 +232,46 @@ class LcdApi:
     def write_char(self, col, row, char):
         """ write character to (col, row) """
         if self.lcd_mode:
-            self._set_cursor(col, row)
-            self._write_out(char)
+            self._update(col, row, bytes(str(char), 'utf-8'))
         else:
             print(f'({col}, {row}): {char}')
 
+    def write_glyph(self, col, row, name):
+        """ write custom glyph to (col, row) """
+        if self.lcd_mode:
+            self._update(col, row, bytes((self.glyph(name),)))
+        else:
+            print(f'({col}, {row}): <{name}>')
+
+    @staticmethod
+    def bar_steps(width, value, full=1):
+        """ return bar length in steps, 5 per cell, for value / full
+            - int value and full: integer arithmetic, no float
+        """
+        if full <= 0:
+            return 0
+        value = min(max(value, 0), full)
+        return int((value * width * 10 // full + 1) // 2)
+
+    def write_bar(self, row, col, width, value, full=1):
+        """ write bar graph of value / full over width cells
+            - value 0.0 to 1.0 with the default full; or integer value
+                0 to full
+            - 5 steps per cell: full cells, then one partial-cell glyph
+        """
+        width = min(width, self._cols - col)
+        n = self.bar_steps(width, value, full)
+        full = n // 5
+        if self.lcd_mode:
+            bar = self._bar
+            for i in range(width):
+                bar[i] = self.FULL_BLOCK if i < full else 0x20
+            if n % 5:
+                bar[full] = self.glyph(self.BARS[n % 5])
+            self._update(col, row, memoryview(bar)[:width])
+        else:
+            print(f'({col}, {row}): [' + '#' * full + ' ' * (width - full) + ']')
+
 
 class RgbLcd1602(LcdApi):
     """ has errors """
@@ -191,7 +332,7 @@ def main():
     if lcd.lcd_mode:
         lcd.write_line(0, f'Test successful')
         sleep_ms(200)
-        lcd.write_line(1, f'sda: {pins['sda']} scl: {pins['scl']}')
+        lcd.write_line(1, f'sda: {pins["sda"]} scl: {pins["scl"]}')
     else:
         print('LCD Display not found')
         print(pins)
@@ -0,0 +1,129 @@
+# lcd_44780.py
+""" HD44780 LCD on a PCF8574 I2C backpack; LcdApi interface """
+
+from time import sleep_ms
+
+from micropython import const
+
+from lcd_1602 import LcdApi
+
+
+class Lcd44780(LcdApi):
+    """ drive HD44780 display through a PCF8574 backpack
+        - backpack pins: P0 RS, P1 RW, P2 E, P3 backlight, P4-P7 D4-D7
+        - each byte is sent as 2 nibbles, each strobed by E high then
+            low: 4 backpack bytes per display byte
+        - the strobe bytes for a whole command or string are packed into
+            one buffer and sent in one writeto()
+        - the backpack is found by scan of the two common defaults
+            only: 0x20-0x26 and 0x38-0x3e are shared with the I/O
+            expanders and LcdApi.I2C_ADDR; any other address must be
+            given as addr=
+    """
+
+    ADDRS = (0x27, 0x3f)  # PCF8574 and PCF8574A, all address links open
+
+    RS = const(0x01)
+    EN = const(0x04)
+    BACKLIGHT = const(0x08)
+
+    ROW_ADDR = (0x00, 0x40, 0x14, 0x54)  # DDRAM address of each row
+
+    def __init__(self, pins_, dim_=(16, 2), addr=None):
+        self._addr_req = addr
+        self._bl = self.BACKLIGHT
+        self._tx = bytearray(4 * max(dim_[0], 8))  # a row, or a glyph
+        self._mv = memoryview(self._tx)
+        super().__init__(pins_, dim_)
+
+    def _find_addr(self, addresses):
+        """ return backpack address from scan, or None """
+        if self._addr_req is not None:
+            return self._addr_req if self._addr_req in addresses else None
+        for addr in self.ADDRS:
+            if addr in addresses:
+                return addr
+        return None
+
+    def _pack(self, i, value, rs):
+        """ pack strobed nibbles of value into the buffer at i; return next i """
+        tx = self._tx
+        b = value & 0xf0 | rs | self._bl
+        tx[i] = b | self.EN
+        tx[i + 1] = b
+        b = value << 4 & 0xf0 | rs | self._bl
+        tx[i + 2] = b | self.EN
+        tx[i + 3] = b
+        return i + 4
+
+    def _send(self, n):
+        """ write n bytes of the buffer in one transaction """
+        self.i2c.writeto(self.addr, self._mv[:n])
+        self.n_trans += 1
+        self.n_bytes += n
+
+    def _nibble(self, value):
+        """ send one strobed nibble: 8-bit mode initialisation """
+        tx = self._tx
+        tx[0] = value << 4 | self._bl | self.EN
+        tx[1] = value << 4 | self._bl
+        self._send(2)
+
+    # transport: all I2C writes to the display
+
+    def _command(self, cmd):
+        """ invoke command """
+        self._send(self._pack(0, cmd, 0))
+
+    def _set_cursor(self, col, row):
+        """ set cursor for write """
+        self._command(0x80 | self.ROW_ADDR[row] + col)
+
+    def _write_bytes(self, buf):
+        """ write out bytes at cursor position in one transaction """
+        i = 0
+        for c in buf:
+            i = self._pack(i, c, self.RS)
+        self._send(i)
+
+    def _start(self, lines):
+        """ switch to 4-bit mode, then start as LcdApi """
+        sleep_ms(50)
+        for _ in range(3):
+            self._nibble(0x03)
+            sleep_ms(5)
+        self._nibble(0x02)
+        super()._start(lines)
+
+    # interface functions
+
+    def backlight(self, on):
+        """ set backlight on or off """
+        self._bl = self.BACKLIGHT if on else 0
+        if self.lcd_mode:
+            self._tx[0] = self._bl
+            self._send(1)
+
+
+def main():
+    """ test of LCD """
+    pins = {'sda': 0, 'scl': 1}
+    lcd = Lcd44780(pins)
+    print(f'I2C addresses found: {lcd.addresses}')
+    lcd.clear()
+    sleep_ms(1000)
+
+    if lcd.lcd_mode:
+        lcd.write_line(0, f'Backpack: {lcd.addr:#x}')
+        sleep_ms(200)
+        lcd.write_line(1, f'sda: {pins["sda"]} scl: {pins["scl"]}')
+    else:
+        print('LCD Display not found')
+        print(pins)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        print('Execution complete')
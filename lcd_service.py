@@ -0,0 +1,91 @@
+# lcd_service.py
+"""
+    Non-blocking display updates for LcdApi
+    - callers submit line or field updates without awaiting
+    - an update replaces any pending update to the same region, or to
+        a region it covers: only the latest text is sent
+    - one background task sends pending updates in submission order,
+        at most one every interval_ms
+"""
+
+import asyncio
+
+from micropython import const
+
+
+class LcdService:
+    """ queue display updates for a background task """
+
+    # update kinds
+    LINE = const(0)
+    FIELD = const(1)
+    GLYPH = const(2)
+    BAR = const(3)
+
+    def __init__(self, lcd, interval_ms=20):
+        self.lcd = lcd
+        self.cols = lcd.dim['cols']
+        self.interval_ms = interval_ms
+        self._pending = []  # [col, row, width, kind, value], oldest first
+        self._ev = asyncio.Event()
+        self.n_submitted = 0
+        self.n_sent = 0
+
+    def _submit(self, col, row, width, kind, value):
+        """ add update; drop pending updates it covers """
+        end = col + width
+        pending = self._pending
+        i = 0
+        while i < len(pending):
+            p = pending[i]
+            if p[1] == row and p[0] >= col and p[0] + p[2] <= end:
+                pending.pop(i)
+            else:
+                i += 1
+        pending.append([col, row, width, kind, value])
+        self.n_submitted += 1
+        self._ev.set()
+
+    def write_line(self, row, text):
+        """ submit text for left-justified display row """
+        self._submit(0, row, self.cols, self.LINE, text)
+
+    def write_field(self, col, row, text):
+        """ submit text at (col, row) """
+        text = str(text)[:self.cols - col]
+        self._submit(col, row, len(text), self.FIELD, text)
+
+    def write_glyph(self, col, row, name):
+        """ submit custom glyph at (col, row); see LcdApi.GLYPHS """
+        self._submit(col, row, 1, self.GLYPH, name)
+
+    def write_bar(self, row, col, width, value, full=1):
+        """ submit bar graph of value / full; see LcdApi.write_bar()
+            - submitted as an int: bar length in steps
+        """
+        width = min(width, self.cols - col)
+        self._submit(col, row, width, self.BAR, self.lcd.bar_steps(width, value, full))
+
+    def write_display(self, line_0_str, line_1_str):
+        """ submit both display lines """
+        self.write_line(0, line_0_str)
+        self.write_line(1, line_1_str)
+
+    async def serve(self):
+        """ coro: send pending updates at a bounded rate """
+        pending = self._pending
+        while True:
+            await self._ev.wait()
+            self._ev.clear()
+            while pending:
+                col, row, width, kind, value = pending.pop(0)
+                if kind == self.LINE:
+                    self.lcd.write_line(row, value)
+                elif kind == self.FIELD:
+                    self.lcd.write_char(col, row, value)
+                elif kind == self.GLYPH:
+                    self.lcd.write_glyph(col, row, value)
+                else:
+                    self.lcd.write_bar(row, col, width, value, width * 5)
+                self.n_sent += 1
+                await asyncio.sleep_ms(self.interval_ms)
@@ -7,8 +7,14 @@
     - see: https://github.com/pimoroni/pimoroni-pico/blob/main/micropython/modules_py/pimoroni.py
 """
 
+import asyncio
+from array import array
+from time import ticks_ms, ticks_diff
+
 from machine import Pin, PWM
 
+from colour_space import ColourSpace
+
 
 class PWMLed(PWM):
     """
@@ -19,15 +25,18 @@ class PWMLed(PWM):
         - self.dc_u16 stores last-set value
         - dc_u8 is user scaling [0...255]
         - dc_pc is user scaling [0...100]
+        - set_level() is linear, gamma-corrected to u16 by table lookup;
+            level bits: 8, 10 or 12
     """
 
     # super() does not support keyword arguments
-    def __init__(self, pin_):
+    def __init__(self, pin_, bits=8):
         super().__init__(Pin(pin_))
         self.pin = pin_  # for debug
         self.freq(1000)
         self.duty_u16(0)
         self.dc_u16 = 0  # for off/on dc restore
+        self.gamma_lut = ColourSpace.gamma_u16(bits)
 
     def set_dc_u16(self, dc_u16_):
         """ set PWM duty cycle and store value """
@@ -38,6 +47,10 @@ class PWMLed(PWM):
         """ set PWM duty cycle by 8-bit range """
         self.set_dc_u16(dc_u8_ * 257)
 
+    def set_level(self, level_):
+        """ set PWM duty cycle by linear level, gamma corrected """
+        self.set_dc_u16(self.gamma_lut[level_])
+
     def set_dc_pc(self, dc_pc_):
         """ set PWM duty cycle by percentage range """
         self.set_dc_u16(dc_pc_ * 65535 // 100)
@@ -51,6 +64,119 @@ class PWMLed(PWM):
         self.duty_u16(0)
 
 
+class PWMFadeGroup:
+    """
+        Fade a group of PWMLed channels from one task
+        - fade() sets a channel target duty cycle and fade period;
+            the fade starts from the channel's current output: read from
+            duty_u16() unless the channel is already fading, so that
+            turn_off(), turn_on() and set_dc_*() between fades are seen
+        - each step advances active fades only; idle channels cost nothing
+        - duty_u16() is written only when a channel value changes
+        - n_steps: channel-steps advanced; n_writes: duty_u16() writes
+        - lut: if set, e.g. ColourSpace.gamma_u16(12), fades are in linear
+            levels, gamma corrected by one lookup per write; slow dim
+            fades then step in fractions of an 8-bit level
+    """
+
+    def __init__(self, leds, step_ms=10, lut=None):
+        self.leds = leds
+        self.step_ms = step_ms
+        self.lut = lut
+        n = len(leds)
+        # current value: linear level if lut, else duty cycle
+        self._level = array('H', [0] * n)
+        self._dc = array('H', [0] * n)  # current output duty cycle
+        for i in range(n):
+            self._read(i)
+        self._from = array('H', [0] * n)
+        self._to = array('H', [0] * n)
+        self._t_0 = array('i', [0] * n)
+        self._period = array('i', [1] * n)
+        self._active = []  # channel indices with fades in progress
+        self._ev = asyncio.Event()
+        self.n_steps = 0
+        self.n_writes = 0
+
+    def _read(self, i):
+        """ set channel i current value from its output duty cycle
+            - lut: the lowest level whose duty cycle reaches the output
+        """
+        dc = self.leds[i].duty_u16()
+        self._dc[i] = dc
+        lut = self.lut
+        if not lut:
+            self._level[i] = dc
+            return
+        lo = 0
+        hi = len(lut) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if lut[mid] < dc:
+                lo = mid + 1
+            else:
+                hi = mid
+        self._level[i] = lo
+
+    def fade(self, i, value, period_ms):
+        """ fade channel i to value over period_ms
+            - value: linear level if lut is set, else duty cycle
+        """
+        if i not in self._active:
+            self._read(i)
+        self._from[i] = self._level[i]
+        self._to[i] = value
+        self._t_0[i] = ticks_ms()
+        self._period[i] = max(period_ms, 1)
+        if i not in self._active:
+            self._active.append(i)
+        self._ev.set()
+
+    def set_value(self, i, value):
+        """ end any fade and set channel i now """
+        if i in self._active:
+            self._active.remove(i)
+        else:
+            self._read(i)
+        self._write(i, value)
+
+    def is_fading(self, i):
+        """ return True if channel i is fading """
+        return i in self._active
+
+    def _write(self, i, value):
+        """ set channel duty cycle if changed """
+        self._level[i] = value
+        dc_u16 = self.lut[value] if self.lut else value
+        if dc_u16 != self._dc[i]:
+            self.leds[i].set_dc_u16(dc_u16)
+            self._dc[i] = dc_u16
+            self.n_writes += 1
+
+    async def run(self):
+        """ coro: advance all active fades each step """
+        active = self._active
+        while True:
+            if not active:
+                self._ev.clear()
+                await self._ev.wait()
+            now = ticks_ms()
+            j = 0
+            while j < len(active):
+                i = active[j]
+                dt = ticks_diff(now, self._t_0[i])
+                if dt >= self._period[i]:
+                    dc = self._to[i]
+                    active.pop(j)
+                else:
+                    dc = self._from[i] + (
+                        self._to[i] - self._from[i]) * dt // self._period[i]
+                    j += 1
+                self._write(i, dc)
+                self.n_steps += 1
+            await asyncio.sleep_ms(self.step_ms)
+
+
 def main():
     """ """
     pass
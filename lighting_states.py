@@ -17,8 +17,8 @@ class Start(LightingState):
 
     async def state_enter(self):
         """ auto trigger to next state """
-        print(f'Enter state: {self.name}')
-        asyncio.create_task(self.system.transition(self.transitions['auto']))
+        self.log_enter()
+        self.post('auto')
 
 
 class Off(LightingState):
@@ -45,7 +45,7 @@ class Day(LightingState):
     async def state_task(self):
         """ run while in state """
         async with self.system.state_lock:
-            self.set_strip_rgb(self.state_rgb['Day'])
+            self.set_strip_lin(self.state_rgb['Day'])
             self.write_strip()
             self.lcd.write_display(self.system.lcd_str['state'],
                                    self.system.lcd_str[self.name])
@@ -61,7 +61,7 @@ class Night(LightingState):
     async def state_task(self):
         """ run while in state """
         async with self.system.state_lock:
-            self.set_strip_rgb(self.state_rgb['Night'])
+            self.set_strip_lin(self.state_rgb['Night'])
             self.write_strip()
             self.lcd.write_display(self.system.lcd_str['state'],
                                    self.system.lcd_str[self.name])
@@ -82,8 +82,9 @@ class ClockDay(LightingState):
 
     async def state_enter(self):
         """ on state entry """
-        print(f'Enter state: {self.name}')
-        await self.system.lcd.write_display(f'{self.name:<16}', f'{" ":<16}')
+        self.log_enter()
+        self.lcd.write_display(self.name, '')
+        self.lcd.write_glyph(15, 0, 'sun')
         self.remain = True  # in state: flag for while loops
         await self.schedule_tasks()
 
@@ -92,10 +93,9 @@ class ClockDay(LightingState):
         # if it is Day, set as Day, else transition to Night
         if self.dawn <= self.system.v_minutes < self.dusk:  # Day
             async with self.system.state_lock:
-                await self.do_fade('Night', 'Mid')
-                await self.do_fade('Mid', 'Day')
+                await self.play_track(self.phase_track('Night', 'Mid', 'Day'))
         else:  # Night
-            await self.buffer.put('T1')
+            self.post('T1')
 
 
 class ClockNight(LightingState):
@@ -108,8 +108,9 @@ class ClockNight(LightingState):
 
     async def state_enter(self):
         """ on state entry """
-        print(f'Enter state: {self.name}')
-        await self.system.lcd.write_display(f'{self.name:<16}', f'{" ":<16}')
+        self.log_enter()
+        self.lcd.write_display(self.name, '')
+        self.lcd.write_glyph(15, 0, 'moon')
         self.remain = True  # in state: flag for while loops
         await self.schedule_tasks()
 
@@ -117,8 +118,7 @@ class ClockNight(LightingState):
         """ run while in state """
         # can only transition here from Day
         async with self.system.state_lock:
-            await self.do_fade('Day', 'Mid')
-            await self.do_fade('Mid', 'Night')
+            await self.play_track(self.phase_track('Day', 'Mid', 'Night'))
 
 
 class Finish(LightingState):
@@ -136,4 +136,4 @@ class Finish(LightingState):
     async def state_task(self):
         """ flag completes system.run_system task """
         self.system.run = False
-        asyncio.sleep_ms(200)
+        await asyncio.sleep_ms(200)
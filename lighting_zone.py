@@ -0,0 +1,113 @@
+# lighting_zone.py
+""" lighting zone: one state-machine instance over part of the strip """
+
+import asyncio
+
+from v_clock import VClock, conv_vt_m
+
+
+class LightingZone:
+    """
+        context for lighting states over a set of strip pixels
+        - pixels: (index, count) range or list of pixel indices
+        - offset_m: virtual-minute offset of zone time from the system clock
+        - dawn and dusk can be set per zone as 'hh:mm'; default is system
+        - set methods change zone pixels only; write_strip requests a frame
+            from the system renderer: one strip write per frame for all zones
+        - events for this zone only are posted as (zone_id, event)
+    """
+
+    def __init__(self, system, zone_id, zone_def):
+        self.system = system
+        self.zone_id = zone_id
+        self.name = zone_def['name']
+        self.pxl_drv = system.pxl_drv
+        if 'pixels' in zone_def:
+            self.pixels = tuple(zone_def['pixels'])
+            self.set_strip_lin = self.set_list_lin
+        else:
+            self.index = zone_def['index']
+            self.count = zone_def['count']
+            self.set_strip_lin = self.set_range_lin
+        self.offset_m = zone_def.get('offset_m', 0)
+        self.phase_m = {
+            'dawn_m': conv_vt_m(zone_def['dawn']) if 'dawn' in zone_def
+            else system.phase_m['dawn_m'],
+            'dusk_m': conv_vt_m(zone_def['dusk']) if 'dusk' in zone_def
+            else system.phase_m['dusk_m']
+        }
+
+        # aliases for states
+        self.v_clock = system.v_clock
+        self.bus = system.bus
+        self.lcd = system.lcd
+        self.log = system.log
+        self.lcd_str = system.lcd_str
+        self.phase_hsv = system.phase_hsv
+        self.state_rgb = system.state_rgb
+
+        # no concurrent states or transitions within the zone
+        self.state_lock = asyncio.Lock()
+        self.transition_lock = asyncio.Lock()
+
+        self.table = system.table
+        self.states = tuple(
+            [system.state_classes[name](self) for name in self.table.states])
+        self.state_id = self.table.initial
+        self.state = self.states[self.state_id]
+
+    @property
+    def v_minutes(self):
+        """ zone virtual minutes since midnight """
+        return (self.v_clock.v_minutes + self.offset_m) % VClock.M_IN_DAY
+
+    @property
+    def run(self):
+        """ system run flag """
+        return self.system.run
+
+    @run.setter
+    def run(self, value):
+        self.system.run = value
+
+    def set_range_lin(self, rgb_):
+        """ fill zone range with linear RGB """
+        self.pxl_drv.set_range_lin(self.index, self.count, rgb_)
+
+    def set_list_lin(self, rgb_):
+        """ fill zone pixel list with linear RGB """
+        self.pxl_drv.set_list_lin(self.pixels, rgb_)
+
+    def write_strip(self):
+        """ request strip write at next frame """
+        self.system.frame_ev.set()
+
+    def clear_strip(self):
+        """ set zone pixels off """
+        self.set_strip_lin((0, 0, 0))
+        self.write_strip()
+
+    def set_cues(self):
+        """ register daily dawn and dusk cues, in zone time """
+        self.v_clock.daily(self.phase_m['dawn_m'] - self.offset_m, self.dawn_cue)
+        self.v_clock.daily(self.phase_m['dusk_m'] - self.offset_m, self.dusk_cue)
+
+    def dawn_cue(self, _):
+        """ clock cue: post dawn event """
+        self.post('T0')
+
+    def dusk_cue(self, _):
+        """ clock cue: post dusk event """
+        self.post('T1')
+
+    def post(self, event):
+        """ post event to this zone only """
+        self.bus.publish_nowait('zone', (self.zone_id, event))
+
+    async def transition(self, state_id):
+        """ transition from current to new state """
+        await self.state.state_exit()
+        async with self.transition_lock:
+            self.state_id = state_id
+            self.state = self.states[state_id]
+            self.state.start()
@@ -0,0 +1,17 @@
+# log_codes.py
+"""
+    Ring-log entry codes for the lighting system; see ring_log.py
+
+    - codes are const(): states and the system import them directly
+    - LightingSystem defines the format and name tables of each code,
+        in code order
+"""
+
+from micropython import const
+
+LOG_EVENT = const(0)  # event id dispatched
+LOG_REPORT = const(1)
+LOG_ENTER = const(2)  # zone id, state id
+LOG_FADE = const(3)  # zone id, phase index: DEBUG
+LOG_TRACK = const(4)  # zone id, writes, writes saved: DEBUG
+LOG_DROP = const(5)  # first three characters of an unknown event: DEBUG
@@ -0,0 +1,158 @@
+# loop_lag.py
+"""
+    Asyncio loop-lag watchdog: find calls that block the scheduler
+
+    - the watchdog task sleeps interval_ms repeatedly; the lateness of
+        each wake-up is the loop lag: time when no other task could run
+    - code is tagged by wrappers on the running objects: each call of a
+        tagged function, or resumption of a tagged coroutine, is timed;
+        the longest since the previous wake-up is blamed for the lag
+    - the worst n_worst lags are kept, with their tags, in preallocated
+        arrays; a lag over alert_ms calls on_alert(lag_us, tag), or prints
+    - nothing is wrapped unless a LoopLag is installed
+
+    LoopLag().install(system) tags a LightingSystem: strip writes, LCD
+    calls, zone transitions, state steps, gc collections and print(),
+    then starts the watchdog. Code that is not tagged can call mark(tag).
+    - print() blocks while the USB or UART console drains: it is tagged
+        by replacing builtins.print, which the rp2 port allows; where
+        builtins cannot be replaced, print is left untagged
+"""
+
+import asyncio
+from array import array
+
+from time import ticks_us, ticks_diff
+
+try:
+    import builtins
+except ImportError:
+    builtins = None
+
+from profiler import _Steps
+
+
+class LoopLag:
+    """ watchdog task and worst-lag record """
+
+    def __init__(self, interval_ms=10, n_worst=8, alert_ms=None, on_alert=None):
+        self.interval_ms = interval_ms
+        self.alert_us = alert_ms * 1000 if alert_ms else None
+        self.on_alert = on_alert
+        self.worst_us = array('i', [0] * n_worst)
+        self.worst_tag = [None] * n_worst
+        self.n = 0
+        self.total_us = 0
+        self.max_us = 0
+        self.n_alerts = 0
+        self._tag = None  # longest-running tag since the last wake-up
+        self._tag_us = 0
+        self.last = None  # last tag to run
+
+    def ran(self, tag, t_us):
+        """ tagged code ran for t_us """
+        self.last = tag
+        if t_us > self._tag_us:
+            self._tag = tag
+            self._tag_us = t_us
+
+    def mark(self, tag):
+        """ untimed tag: code about to run """
+        self.last = tag
+
+    def _record(self, lag_us):
+        """ record wake-up lag and its blamed tag """
+        tag = self._tag if self._tag is not None else self.last
+        self.n += 1
+        self.total_us += lag_us
+        if lag_us > self.max_us:
+            self.max_us = lag_us
+        # replace the smallest of the worst lags
+        worst = self.worst_us
+        i_min = 0
+        for i in range(1, len(worst)):
+            if worst[i] < worst[i_min]:
+                i_min = i
+        if lag_us > worst[i_min]:
+            worst[i_min] = lag_us
+            self.worst_tag[i_min] = tag
+        if self.alert_us is not None and lag_us > self.alert_us:
+            self.n_alerts += 1
+            if self.on_alert:
+                self.on_alert(lag_us, tag)
+            else:
+                print(f'Loop lag: {lag_us}us after {tag}')
+
+    async def watch(self):
+        """ coro: watchdog task """
+        interval_ms = self.interval_ms
+        interval_us = interval_ms * 1000
+        while True:
+            self._tag = None
+            self._tag_us = 0
+            t_0 = ticks_us()
+            await asyncio.sleep_ms(interval_ms)
+            lag_us = ticks_diff(ticks_us(), t_0) - interval_us
+            self._record(lag_us if lag_us > 0 else 0)
+
+    def tag(self, obj, attr, tag):
+        """ replace obj.attr function with a timed, tagged wrapper """
+        fn = getattr(obj, attr)
+        ran = self.ran
+
+        def tagged(*args, **kwargs):
+            t_0 = ticks_us()
+            result = fn(*args, **kwargs)
+            ran(tag, ticks_diff(ticks_us(), t_0))
+            return result
+
+        setattr(obj, attr, tagged)
+
+    def tag_steps(self, obj, attr, tag):
+        """ replace obj.attr coroutine function: tag each resumption """
+        fn = getattr(obj, attr)
+        ran = self.ran
+
+        def add(t_us):
+            ran(tag, t_us)
+
+        async def tagged(*args, **kwargs):
+            return await _Steps(fn(*args, **kwargs), add)
+
+        setattr(obj, attr, tagged)
+
+    def install(self, system):
+        """ tag the blocking calls of a LightingSystem; start the watchdog """
+        system.loop_lag = self
+        self.tag(system.pxl_drv, 'write', 'write')
+        lcd = system.lcd.lcd
+        for attr in ('write_line', 'write_char', 'write_glyph', 'write_bar', 'clear'):
+            self.tag(lcd, attr, 'lcd.' + attr)
+        if hasattr(lcd, 'set_colour'):
+            self.tag(lcd, 'set_colour', 'lcd.set_colour')
+        for zone in system.zones:
+            self.tag_steps(zone, 'transition', 'transition')
+            for state in zone.states:
+                self.tag_steps(state, 'state_enter', 'state.' + state.name)
+        self.tag(system.gc_sched, 'collect', 'gc')
+        if builtins:
+            try:
+                self.tag(builtins, 'print', 'print')
+            except (AttributeError, TypeError):
+                pass  # builtins are read-only in this build
+        asyncio.create_task(self.watch())
+
+    def worst(self):
+        """ return list of (lag_us, tag), worst first """
+        pairs = [(self.worst_us[i], self.worst_tag[i])
+                 for i in range(len(self.worst_us)) if self.worst_us[i]]
+        pairs.sort(key=lambda p: -p[0])
+        return pairs
+
+    def dump(self):
+        """ print summary to the console """
+        mean = self.total_us // self.n if self.n else 0
+        print(f'Loop lag: n {self.n} mean {mean}us max {self.max_us}us '
+              f'alerts {self.n_alerts}')
+        for lag_us, tag in self.worst():
+            print(f'  {lag_us:>8}us {tag}')
@@ -5,6 +5,9 @@
     Encoding:
     User: RGB(W) tuple of u8 values, or HSV values as [0.0...1.0]
     Internal: colour as u24 word, target-dependent
+    _lin methods take linear RGB and apply the calibration tables
+    - default tables are ColourSpace.RGB_GAMMA for each channel
+    - see calibration.py for per-channel and per-segment profiles
 
     Classes:
     PixelStrip:
@@ -24,6 +27,7 @@
 
 import asyncio
 import json
+from array import array
 from colour_space import ColourSpace
 
 
@@ -42,8 +46,14 @@ class PixelStrip:
         self.driver.set_active()
         self.arr = self.driver.arr
         self.encode_rgb = self.driver.encode_rgb
+        self.encode_ints = self.driver.encode_ints
         self.write = self.driver.write
         self.cs = ColourSpace()
+        # calibration: default to a single table set and no segments
+        self.calibration = None
+        self.lut_sets = ((self.cs.RGB_GAMMA, self.cs.RGB_GAMMA, self.cs.RGB_GAMMA),)
+        self.seg_map = None
+        self._clrs = array('I', [0])  # scratch: encode_lin_sets
 
     # match MP NeoPixel interface with len, setitem and getitem
 
@@ -94,6 +104,18 @@ class PixelStrip:
         for i in index_list_:
             arr_[i] = colour_u24
 
+    def encode_rgb_lg(self, rgb_, level_=255):
+        """ encode RGB tuple or colour name, level and gamma corrected
+            - as ColourSpace.rgb_lg() without the RGB tuple
+        """
+        if isinstance(rgb_, str):
+            rgb_ = self.cs.colours[rgb_]
+        level_ = max(min(level_, 255), 0)
+        gamma = self.cs.RGB_GAMMA
+        return self.encode_ints(gamma[rgb_[0] * level_ // 255],
+                                gamma[rgb_[1] * level_ // 255],
+                                gamma[rgb_[2] * level_ // 255])
+
     def set_pixel_rgb(self, index, rgb_):
         """ set pixel by RGB tuple """
         self.set_pixel(index, self.encode_rgb(rgb_))
@@ -110,6 +132,75 @@ class PixelStrip:
         """ fill index_list pixels with RGB tuple """
         self.set_list(index_list_, self.encode_rgb(rgb_))
 
+    # calibrated (linear RGB) methods
+
+    def set_calibration(self, calibration_):
+        """ use compiled calibration profiles; see calibration.py """
+        self.calibration = calibration_
+        self.set_profile(calibration_.name)
+
+    def set_profile(self, name_):
+        """ switch calibration profile: swap table references only """
+        self.calibration.set_profile(name_)
+        self.lut_sets = self.calibration.lut_sets
+        self.seg_map = self.calibration.seg_map
+        if len(self._clrs) != len(self.lut_sets):
+            self._clrs = array('I', [0] * len(self.lut_sets))
+
+    def encode_lin(self, rgb_, set_index=0):
+        """ encode linear RGB through calibration table set """
+        luts = self.lut_sets[set_index]
+        return self.encode_ints(luts[0][rgb_[0]], luts[1][rgb_[1]], luts[2][rgb_[2]])
+
+    def encode_lin_sets(self, rgb_):
+        """ return encoded colours, one per table set
+            - in a scratch array: valid until the next call
+        """
+        clrs = self._clrs
+        for i in range(len(clrs)):
+            clrs[i] = self.encode_lin(rgb_, i)
+        return clrs
+
+    def set_pixel_lin(self, index, rgb_):
+        """ set pixel by linear RGB tuple """
+        if self.seg_map is None:
+            self.arr[index] = self.encode_lin(rgb_)
+        else:
+            self.arr[index] = self.encode_lin(rgb_, self.seg_map[index])
+
+    def set_strip_lin(self, rgb_):
+        """ fill pixel strip with linear RGB tuple """
+        if self.seg_map is None:
+            self.set_strip(self.encode_lin(rgb_))
+        else:
+            self.set_range_lin(0, self.n_pixels, rgb_)
+
+    def set_range_lin(self, index_, count_, rgb_):
+        """ fill count_ pixels with linear RGB tuple """
+        if self.seg_map is None:
+            self.set_range(index_, count_, self.encode_lin(rgb_))
+        else:
+            arr_ = self.arr
+            seg_map = self.seg_map
+            clrs = self.encode_lin_sets(rgb_)
+            i = index_ % self.n_pixels
+            for _ in range(count_):
+                arr_[i] = clrs[seg_map[i]]
+                i += 1
+                if i == self.n_pixels:
+                    i = 0
+
+    def set_list_lin(self, index_list_, rgb_):
+        """ fill index_list pixels with linear RGB tuple """
+        if self.seg_map is None:
+            self.set_list(index_list_, self.encode_lin(rgb_))
+        else:
+            arr_ = self.arr
+            seg_map = self.seg_map
+            clrs = self.encode_lin_sets(rgb_)
+            for i in index_list_:
+                arr_[i] = clrs[seg_map[i]]
+
 
 class Grid(PixelStrip):
     """ extend NeoPixel to support BTF-Lighting 8x8 grid
@@ -129,12 +220,13 @@ class Grid(PixelStrip):
             retrieved[ch] = tuple(retrieved[ch])
         return retrieved
 
-    def __init__(self, driver_, n_cols_, n_rows_, charset_file):
+    def __init__(self, driver_, n_cols_, n_rows_, charset_file=None):
         super().__init__(driver_, n_cols_ * n_rows_)
         self.driver = driver_
         self.n_cols = n_cols_
         self.n_rows = n_rows_
-        self.charset = self.get_char_indices(charset_file)
+        # no charset_file: setters only, no characters
+        self.charset = self.get_char_indices(charset_file) if charset_file else None
         self.max_col = self.n_cols - 1
         self.max_row = self.n_rows - 1
         # build dict: (col, row) to pixel-index conversion
@@ -281,7 +373,7 @@ class BlockGrid(Grid):
         - optional: include a virtual right-hand block for char shift-in
     """
 
-    def __init__(self, driver_, n_b_cols, n_b_rows, n_blocks, charset_file):
+    def __init__(self, driver_, n_b_cols, n_b_rows, n_blocks, charset_file=None):
         self.block_cols = n_b_cols
         self.n_cols = n_b_cols * n_blocks
         self.n_rows = n_b_rows
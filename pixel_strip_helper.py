@@ -1,7 +1,10 @@
 # pixel_strip_helper.py
 # helper methods for PixelStrip
+# - effect frames do not allocate: colours are resolved and encoded
+#   before the loop, or encoded from plain ints; see alloc_audit.py
 
 import asyncio
+from array import array
 from random import randrange
 
 
@@ -9,8 +12,8 @@ async def np_arc_weld(nps, cs, pixel_, play_ev):
     """ coro: drive a single pixel to simulate
         arc-weld flash and 'glow' decay
     """
-    arc_rgb_ = 'white'
-    glow_rgb_ = 'red'
+    arc_rgb_ = cs.colours['white']
+    glow_rgb_ = cs.colours['red']
     while play_ev.is_set():
         # flash 100 to 200 times at random level
         for _ in range(randrange(100, 200)):
@@ -20,7 +23,7 @@ async def np_arc_weld(nps, cs, pixel_, play_ev):
             await asyncio.sleep_ms(20)
         # fade out glow
         for level in range(128, -1, -1):
-            nps[pixel_] = cs.rgb_lg(glow_rgb_, level)
+            nps[pixel_] = nps.encode_rgb_lg(glow_rgb_, level)
             nps.write()
             await asyncio.sleep_ms(10)
         await asyncio.sleep_ms(randrange(1_000, 5_000))
@@ -34,20 +37,23 @@ async def np_twinkler(nps, pixel_, play_ev):
     base_level = 64
     dim_level = 95
     n_smooth = 3
-    # levels list: take mean value
-    levels = [0] * n_smooth
+    # levels array: take mean value from a running total
+    levels = array('H', [0] * n_smooth)
+    total = 0
     l_index = 0
     while play_ev.is_set():
         twinkle = randrange(64, 128, 8)
         # randrange > 0; no 'pop'
         if randrange(0, 50) > 0:  # most likely
+            total += base_level + twinkle - levels[l_index]
             levels[l_index] = base_level + twinkle
-            level = sum(levels) // n_smooth
+            level = total // n_smooth
         # randrange == 0; 'pop'
         else:
-            # set 'pop' across levels list
+            # set 'pop' across levels array
             for i in range(n_smooth):
                 levels[i] = dim_level
+            total = dim_level * n_smooth
             level = dim_level
         nps[pixel_] = nps.encode_rgb_lg(lamp_rgb, level)
         nps.write()
@@ -63,20 +69,25 @@ async def colour_chase(nps, rgb_list, play_ev, pause=20):
         - n_rgb does not have to equal count_
     """
     n_pixels = nps.n_pixels
-    grb_list = []
+    arr = nps.arr
     # convert (R, G, B) encoding to WS2812 GRB
-    for c in rgb_list:
-        grb_list.append(nps.encode_rgb(c))
-    n_colours = len(grb_list)
+    grb_arr = array('I', [nps.encode_rgb(c) for c in rgb_list])
+    n_colours = len(grb_arr)
     index = 0
-    # <% n_pixels> arithmetic is slow but straightforward
+    # indices wrap by comparison: no modulo per pixel
     while play_ev.is_set():
+        j = index
         for i in range(n_colours):
-            nps[(index + i) % n_pixels] = grb_list[i]
+            arr[j] = grb_arr[i]
+            j += 1
+            if j == n_pixels:
+                j = 0
         nps.write()
         await asyncio.sleep_ms(pause)
-        nps[index] = 0
-        index = (index + 1) % n_pixels
+        arr[index] = 0
+        index += 1
+        if index == n_pixels:
+            index = 0
 
 
 async def two_flash(nps, base_index, rgb, flash_ev, period=1000):
@@ -98,7 +109,8 @@ async def two_flash(nps, base_index, rgb, flash_ev, period=1000):
     while True:
         set_display(off, off)
         await asyncio.sleep_ms(write_delay_ms)
-        await flash_ev.wait()  # pass-through or wait for set()
+        if not flash_ev.is_set():  # wait() creates a coroutine: only if needed
+            await flash_ev.wait()
         set_display(grb, off)
         await asyncio.sleep_ms(hold)
         set_display(off, grb)
@@ -10,6 +10,7 @@
 from machine import Pin, PWM, freq
 from micropython import const
 from buttons import HoldButton
+from colour_space import ColourSpace
 
 
 class PimoroniRGB:
@@ -30,6 +31,13 @@ class PimoroniRGB:
         self.led_g.duty_u16((255 - rgb[1]) * 257)
         self.led_b.duty_u16((255 - rgb[2]) * 257)
 
+    def set_rgb_lin(self, rgb, bits=8):
+        """ set linear RGB, bits per channel; gamma corrected to u16 """
+        lut = ColourSpace.gamma_u16(bits)
+        self.led_r.duty_u16(65535 - lut[rgb[0]])
+        self.led_g.duty_u16(65535 - lut[rgb[1]])
+        self.led_b.duty_u16(65535 - lut[rgb[2]])
+
 
 class Plasma:
     """
@@ -53,6 +61,10 @@ class Plasma:
         """ set onboard LED to rgb_ """
         self.led.set_rgb_u8(rgb_)
 
+    def set_onboard_lin(self, rgb_, bits=8):
+        """ set onboard LED to linear rgb_, gamma corrected """
+        self.led.set_rgb_lin(rgb_, bits)
+
 
 class Plasma2040(Plasma):
     """ Pimoroni Plasma 2040 """
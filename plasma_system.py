@@ -2,24 +2,40 @@
 """ model ambient light state transitions """
 
 import asyncio
-import gc
 
+from time import ticks_us
+
+from calibration import Calibration
 from colour_space import ColourSpace
+from gc_sched import GcScheduler
 from lcd_1602 import LcdApi
+from lcd_service import LcdService
 from pixel_strip import PixelStrip
 from plasma import Plasma2040 as DriverBoard
+from loop_lag import LoopLag
+from profiler import Profiler
 from v_clock import VClock, conv_vt_m, conv_m_vt
 from ws2812 import Ws2812
 from lighting_states import Start, Off, Day, Night, ClockDay, ClockNight, Finish
-from buttons import Button, HoldButton, ButtonGroup
-from queue import Buffer
+from lighting_zone import LightingZone
+from buttons import Button, HoldButton, ButtonGroup, IrqButtonGroup
+from queue import EventBus
+from log_codes import LOG_EVENT, LOG_REPORT, LOG_ENTER, LOG_FADE, LOG_TRACK, LOG_DROP
+from ring_log import RingLog, DEBUG, INFO
+from state_table import StateTable
 
 
 class LightingSystem:
     """
         lighting State-Transition system
         - context for lighting states
-        - dict stores: event: transitions
+        - states, events and transitions are read from STATES_FILE
+            and compiled to a StateTable; see state_table.py
+        - zones: each runs its own state-machine instance on a set of
+            pixels, with an optional time offset; see lighting_zone.py
+            -- default is a single zone: the whole strip
+        - a single dispatcher task handles events for all zones
+        - a single render task writes the strip once per frame for all zones
         - call run_system to start
     """
 
@@ -35,7 +51,29 @@ class LightingSystem:
     }
     # phase transition times
     phase_hm = {'dawn': '06:00', 'dusk': '20:30', 'start': '12:00'}
-    t_mpy = 72  # clock-speed multiplier
+    t_mpy = 72  # clock-speed multiplier: int or (numerator, denominator)
+    frame_ms = 20  # minimum interval between strip writes
+    REPORT_EVENT = const('B2')  # print profile and loop lag, if installed
+    # state machine definition: written to STATES_FILE if not found
+    STATES_FILE = 'states.json'
+    state_def = {
+        'initial': 'Start',
+        'states': ['Start', 'Off', 'Day', 'Night', 'ClockDay', 'ClockNight', 'Finish'],
+        'events': ['auto', 'A1', 'B1', 'U2', 'T0', 'T1'],
+        'transitions': {
+            'Start': {'auto': 'Off'},
+            'Off': {'A1': 'Day', 'B1': 'ClockDay', 'U2': 'Finish'},
+            'Day': {'A1': 'Night', 'U2': 'Off'},
+            'Night': {'A1': 'Day', 'U2': 'Off'},
+            'ClockDay': {'T1': 'ClockNight', 'U2': 'Off'},
+            'ClockNight': {'T0': 'ClockDay', 'U2': 'Off'}
+        }
+    }
+    # state classes available to the definition
+    state_classes = {
+        'Start': Start, 'Off': Off, 'Day': Day, 'Night': Night,
+        'ClockDay': ClockDay, 'ClockNight': ClockNight, 'Finish': Finish
+    }
     # strings for LCD
     lcd_str = {
         'blank': ''.center(16),
@@ -50,7 +88,7 @@ class LightingSystem:
     def __init__(self, board_, pxl_drv_, lcd_, **kwargs):
         self.board = board_
         self.pxl_drv = pxl_drv_
-        self.lcd = lcd_
+        self.lcd = LcdService(lcd_)  # display updates do not block
         # override defaults with kwargs if any
         if 'phase_hsv' in kwargs:
             self.phase_hsv = kwargs['phase_hsv']
@@ -68,10 +106,13 @@ class LightingSystem:
             self.t_mpy = kwargs['t_mpy']
         else:
             self.t_mpy = LightingSystem.t_mpy
+        if 'zones' in kwargs:
+            zone_defs = kwargs['zones']
+        else:
+            zone_defs = [{'name': 'all', 'index': 0, 'count': len(self.pxl_drv)}]
 
         self.v_clock = VClock(self.t_mpy)
         self.v_minutes = None  # since midnight
-        self.minute_ev = self.v_clock.minute_ev
         self.phase_m = {'dawn_m': conv_vt_m(self.phase_hm['dawn']),
                         'dusk_m': conv_vt_m(self.phase_hm['dusk'])
                         }
@@ -82,95 +123,144 @@ class LightingSystem:
         self.clr_space = ColourSpace()
         self.state_rgb = {}
 
-        # build RGB dict for state colours
+        # build linear RGB dict for state colours
+        # - gamma is applied by the pixel-strip calibration tables
         for key in self.phase_hsv:
-            self.state_rgb[key] = self.clr_space.rgb_g(
-                self.clr_space.hsv_rgb(self.phase_hsv[key]))
+            self.state_rgb[key] = self.clr_space.hsv_rgb(self.phase_hsv[key])
 
         button_set = tuple([Button(self.board.buttons['A'], 'A'),
                             HoldButton(self.board.buttons['B'], 'B'),
                             HoldButton(self.board.buttons['U'], 'U')])
-        self.buffer = Buffer()
-        self.button_group = ButtonGroup(button_set, self.buffer)
-
-        # no concurrent states or transitions allowed
-        # locks enforce the rules. but might not be required if sequence does that
-        # btn_lock: required to ignore button events (lock out external demands)
-        self.state_lock = asyncio.Lock()
-        self.transition_lock = asyncio.Lock()
-        self.btn_lock = self.button_group.btn_lock
-
-        # aliases
-        self.set_strip_rgb = self.pxl_drv.set_strip_rgb
-        self.clear_strip = self.pxl_drv.clear_strip
-        self.write_strip = self.pxl_drv.write
-
-        # === system states
-        self.start_s = Start(self)
-        self.off_s = Off(self)
-        self.day_s = Day(self)
-        self.night_s = Night(self)
-        self.clock_day_s = ClockDay(self)
-        self.clock_night_s = ClockNight(self)
-        self.finish_s = Finish(self)
-
-        # === system transitions
-        self.start_s.transitions = {'auto': self.off_s}
-        self.off_s.transitions = {'A1': self.day_s,
-                                  'B1': self.clock_day_s,
-                                  'U2': self.finish_s}
-        self.day_s.transitions = {'A1': self.night_s,
-                                  'U2': self.off_s}
-        self.night_s.transitions = {'A1': self.day_s,
-                                    'U2': self.off_s}
-        self.clock_day_s.transitions = {'T1': self.clock_night_s,
-                                        'U2': self.off_s}
-        self.clock_night_s.transitions = {'T0': self.clock_day_s,
-                                          'U2': self.off_s}
-        self.finish_s.transitions = {'auto': None}
+        # events: buttons publish to 'button'; zone and clock events to 'zone'
+        # - the dispatcher queue holds events while a transition completes
+        self.bus = EventBus()
+        self.button_group = IrqButtonGroup(button_set, self.bus)
+        self.events = self.bus.subscribe((ButtonGroup.TOPIC, 'zone'), length=8)
+        self.frame_ev = asyncio.Event()  # zone request for strip write
+        # replaced by profiler.Profiler.install() to time them
+        self.profiler = None
+        self.loop_lag = None  # set by loop_lag.LoopLag.install()
+        self.gc_sched = GcScheduler(self.frame_ms)  # collects between frames
+        self.frame_sleep = asyncio.sleep_ms
+        self.frame_end = self.gc_sched.after_write
+
+        # === system states and transitions
+        if 'state_def' in kwargs:
+            self.table = StateTable(kwargs['state_def'])
+        else:
+            self.table = StateTable.from_cf(self.STATES_FILE, self.state_def)
+        # === deferred log: codes with formats; see ring_log.py
+        self.log = RingLog()
+        zone_names = tuple([z['name'] for z in zone_defs])
+        self.phase_names = tuple(self.phase_hsv)
+        self.log.define(LOG_EVENT, INFO, 'Event: {}', self.table.events)
+        self.log.define(LOG_REPORT, INFO, 'Event: report')
+        self.log.define(
+            LOG_ENTER, INFO, '{}: enter state {}', zone_names, self.table.states)
+        self.log.define(
+            LOG_FADE, DEBUG, '{}: fade to {}', zone_names, self.phase_names)
+        self.log.define(
+            LOG_TRACK, DEBUG, '{}: {} writes; {} saved', zone_names)
+        self.log.define(LOG_DROP, DEBUG, 'Event not in table: {:c}{:c}{:c}')
+        # === zones: a state-machine instance each
+        self.zones = tuple(
+            [LightingZone(self, i, z) for i, z in enumerate(zone_defs)])
         # ===
 
         # start the system
         self.v_clock.init_v_time(conv_vt_m(self.phase_hm['start']))
-        self.state = self.start_s
+        # clock cues replace per-minute polling
+        self.v_clock.every(1, self.show_time)
+        for zone in self.zones:
+            zone.set_cues()
         # cannot await in init
-        asyncio.create_task((self.time_triggers()))
-        self.button_group.poll_buttons()  # activate button self-polling
+        asyncio.create_task(self.dispatch())
+        asyncio.create_task(self.render())
+        asyncio.create_task(self.lcd.serve())
+        asyncio.create_task(self.log.drain())
+        asyncio.create_task(self.gc_sched.idle())
+        self.button_group.poll_buttons()  # activate button interrupts
         self.run = True
 
     async def run_system(self):
         """ this coro is awaited while system is running """
-        await self.state.state_enter()
+        for zone in self.zones:
+            zone.state.start()
         while self.run:
             await asyncio.sleep_ms(200)
 
+    async def render(self):
+        """ coro: write the strip at most once per frame
+            - zones set their pixels then request a write
+            - requests within a frame are combined into one write
+            - garbage is collected in the slack after a write, if due
+        """
+        frame_ms = self.frame_ms
+        write = self.pxl_drv.write
+        frame_end = self.frame_end  # gc in slack; timed when profiled
+        sleep = self.frame_sleep
+        while True:
+            await self.frame_ev.wait()
+            self.frame_ev.clear()
+            t_frame = ticks_us()
+            write()
+            frame_end(t_frame)
+            await sleep(frame_ms)
+
+
+    def show_time(self, v_minutes):
+        """ clock cue: display virtual time """
+        self.lcd.write_field(0, 1, conv_m_vt(v_minutes))
+        self.v_minutes = v_minutes
 
-    async def time_triggers(self):
-        """ set time triggers """
-        dawn_m = int(self.phase_m['dawn_m'])
-        dusk_m = int(self.phase_m['dusk_m'])
-        # wait for clock tick then initialise
-        await self.minute_ev.wait()
-        self.v_clock.minute_ev.clear()
-        self.v_minutes = self.v_clock.v_minutes
+    async def dispatch(self):
+        """ coro: single long-lived task to dispatch events
+            - event is for all zones, or (zone_id, event) for one zone
+            - (state, event) lookup in the compiled table for each zone
+            - events not in the table, or ignored by the state, are dropped;
+                events not in the table are logged at DEBUG
+        """
+        table = self.table
         while True:
-            await self.minute_ev.wait()
-            self.v_clock.minute_ev.clear()  # should not need to be cleared elsewhere
-            v_minutes = self.v_clock.v_minutes
-            self.lcd.write_line(1, conv_m_vt(v_minutes))
-            if v_minutes == dawn_m:
-                await self.buffer.put('T0')
-            elif v_minutes == dusk_m:
-                await self.buffer.put('T1')
-            self.v_minutes = v_minutes
-
-    async def transition(self, new_state):
-        """ transition from current to new ev_type """
-        await self.state.state_exit()
-        async with self.transition_lock:
-            self.state = new_state
-            gc.collect()
-            asyncio.create_task(self.state.state_enter())
+            trigger_ev = await self.events.get()
+            if isinstance(trigger_ev, tuple):
+                zones = (self.zones[trigger_ev[0]],)
+                trigger_ev = trigger_ev[1]
+            else:
+                zones = self.zones
+            # further events are queued until response complete
+            if trigger_ev in table.event_index:
+                event_id = table.event_index[trigger_ev]
+                self.log.log(LOG_EVENT, event_id)
+                for zone in zones:
+                    next_id = table.next_state(zone.state_id, event_id)
+                    if next_id != table.NONE:
+                        await zone.transition(next_id)
+            elif trigger_ev == self.REPORT_EVENT:
+                self.log.log(LOG_REPORT)
+                self.report()
+            elif __debug__:
+                self.log_drop(trigger_ev)
+
+    def log_drop(self, event):
+        """ log an event that is not in the table: up to 3 characters """
+        chars = [ord(ch) for ch in str(event)[:3]]
+        chars += [ord(' ')] * (3 - len(chars))
+        self.log.log(LOG_DROP, *chars)
+
+    def report(self):
+        """ print log, state tasks, and installed profiler and loop-lag summaries """
+        self.log.dump()
+        for zone in self.zones:
+            for state in zone.states:
+                if state.tasks.n_started:
+                    print(f'{zone.name}: {state.name}: {state.tasks.summary()}')
+        print(self.gc_sched.summary())
+        if self.profiler:
+            self.profiler.dump()
+            asyncio.create_task(self.profiler.cycle_lcd(self.lcd))
+        if self.loop_lag:
+            self.loop_lag.dump()
 
 
 async def main():
@@ -179,14 +269,33 @@ async def main():
     # ====== parameters
     n_pixels = 119 + 119
     t_mpy = 72
+    profile = False  # time writes, LCD, transitions and frames; B-hold prints
+    loop_lag = False  # watch for blocking calls; B-hold prints worst
+    lag_alert_ms = None  # ms: if loop_lag, alert on each lag over this
+    dual_core = False  # strip writes on core 1; see dual_core.py
+    # zones: 'index' and 'count', or 'pixels' as a list of indices
+    # - optional: 'offset_m' (virtual minutes), 'dawn' and 'dusk' ('hh:mm')
+    zones = [
+        {'name': 'all', 'index': 0, 'count': n_pixels}
+    ]
     # ====== end-of-parameters
 
     # instantiate system objects
     board = DriverBoard()
     driver = Ws2812(board.strip_pins['dat'])
     nps = PixelStrip(driver, n_pixels)
+    nps.set_calibration(Calibration(n_pixels))
+    writer = None
+    if dual_core:  # before any wrapper of nps.write
+        from dual_core import DualCoreWriter  # _thread: only if used
+        writer = DualCoreWriter(driver, n_pixels)
+        writer.install(nps)
     lcd = LcdApi(board.i2c_pins)
-    system = LightingSystem(board, nps, lcd, t_mpy=t_mpy)
+    system = LightingSystem(board, nps, lcd, t_mpy=t_mpy, zones=zones)
+    if profile:
+        Profiler().install(system)
+    if loop_lag:
+        LoopLag(alert_ms=lag_alert_ms).install(system)
 
     # initialise
     board.set_onboard((0, 1, 0))  # on
@@ -198,6 +307,8 @@ async def main():
         await system.run_system()
     finally:
         print('Closing down the system')
+        if writer and not writer.stop():
+            print('Core 1 writer did not stop')
 
     # await system.set_off()
     await asyncio.sleep_ms(200)
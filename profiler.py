@@ -0,0 +1,239 @@
+# profiler.py
+"""
+    On-device timing: histograms of spans and frame-deadline misses
+
+    - spans are timed by ticks_us() in wrappers that replace methods of
+        the running objects: nothing is wrapped unless a Profiler is
+        installed, so the cost when off is zero
+    - each span name has a Histogram: fixed log2 buckets in a
+        preallocated array, plus count, mean and max
+    - coroutines can be timed per resumption: the time from resume to
+        the next await is the render time of one step or frame
+    - frame deadlines: the render loop sleep is replaced by one that
+        counts wake-ups later than the frame period
+    - dump() prints a summary; cycle_lcd() shows it on the display
+
+    Profiler().install(system) instruments a LightingSystem:
+    - 'write': strip writes; 'lcd.*': LcdApi calls from LcdService
+    - 'transition': zone transitions; 'state.<name>': state steps
+    - 'gc': system collections; 'frame': render-loop deadlines
+    - 'effect': zone pixel setting (set_range_lin, set_list_lin) by
+        state effects and fades; 'render': render-loop frame, from the
+        start of the strip write to the end of any collection after it
+"""
+
+import asyncio
+from array import array
+
+from time import ticks_us, ticks_diff
+from micropython import const
+
+
+class Histogram:
+    """ span times in log2 buckets: bucket i counts t < 64us << i """
+
+    N_BUCKETS = const(12)  # to 64us << 11: 131ms; last also counts longer
+    MIN_US = const(64)
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = array('I', [0] * self.N_BUCKETS)
+        self.n = 0
+        self.total_us = 0
+        self.max_us = 0
+        self.misses = 0  # deadline histograms only
+
+    def add(self, t_us):
+        """ count a span; no allocation for t_us < 2**30 """
+        i = 0
+        limit = self.MIN_US
+        last = self.N_BUCKETS - 1
+        while t_us >= limit and i < last:
+            i += 1
+            limit <<= 1
+        self.counts[i] += 1
+        self.n += 1
+        self.total_us += t_us
+        if t_us > self.max_us:
+            self.max_us = t_us
+
+    def percentile_us(self, pc):
+        """ return upper bound of the bucket holding percentile pc """
+        target = self.n * pc // 100
+        seen = 0
+        for i in range(self.N_BUCKETS):
+            seen += self.counts[i]
+            if seen > target:
+                return self.MIN_US << i
+        return self.max_us
+
+    def summary(self):
+        """ return one-line summary """
+        mean = self.total_us // self.n if self.n else 0
+        s = (f'{self.name}: n {self.n} mean {mean}us '
+             f'p95 <{self.percentile_us(95)}us max {self.max_us}us')
+        if self.misses:
+            s += f' missed {self.misses}'
+        return s
+
+
+class _Steps:
+    """ awaitable: run coro, timing each resumption to its next await """
+
+    def __init__(self, coro, add):
+        self.coro = coro
+        self.add = add  # called with each resumption time in us
+
+    def _run(self):
+        coro = self.coro
+        add = self.add
+        value = None
+        exc = None
+        while True:
+            t_0 = ticks_us()
+            try:
+                if exc is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(exc)
+            except StopIteration as e:
+                add(ticks_diff(ticks_us(), t_0))
+                return e.value
+            add(ticks_diff(ticks_us(), t_0))
+            exc = None
+            value = None
+            try:
+                value = yield yielded
+            except BaseException as e:  # includes CancelledError
+                exc = e
+
+    def __await__(self):
+        return self._run()
+
+    __iter__ = __await__  # MicroPython awaits by iteration
+
+
+class Profiler:
+    """ named histograms and the wrappers that fill them """
+
+    def __init__(self):
+        self.hists = {}
+        self._order = []  # names in creation order, for reports
+
+    def histogram(self, name):
+        """ return histogram for name; create on first use """
+        hist = self.hists.get(name)
+        if hist is None:
+            hist = Histogram(name)
+            self.hists[name] = hist
+            self._order.append(name)
+        return hist
+
+    def wrap(self, obj, attr, name):
+        """ replace obj.attr function with a timed wrapper """
+        fn = getattr(obj, attr)
+        add = self.histogram(name).add
+
+        def timed(*args, **kwargs):
+            t_0 = ticks_us()
+            result = fn(*args, **kwargs)
+            add(ticks_diff(ticks_us(), t_0))
+            return result
+
+        setattr(obj, attr, timed)
+
+    def wrap_async(self, obj, attr, name):
+        """ replace obj.attr coroutine function: time start to end """
+        fn = getattr(obj, attr)
+        add = self.histogram(name).add
+
+        async def timed(*args, **kwargs):
+            t_0 = ticks_us()
+            result = await fn(*args, **kwargs)
+            add(ticks_diff(ticks_us(), t_0))
+            return result
+
+        setattr(obj, attr, timed)
+
+    def wrap_steps(self, obj, attr, name):
+        """ replace obj.attr coroutine function: time each resumption """
+        fn = getattr(obj, attr)
+        add = self.histogram(name).add
+
+        async def timed(*args, **kwargs):
+            return await _Steps(fn(*args, **kwargs), add)
+
+        setattr(obj, attr, timed)
+
+    def steps(self, coro, name):
+        """ return coro wrapped to time each resumption, e.g. effect frames """
+        return _Steps(coro, self.histogram(name).add)
+
+    def deadline_sleep(self, name, slack_ms=0):
+        """ return sleep_ms replacement that counts late wake-ups
+            - histogram of lateness; a miss is later than ms + slack_ms
+        """
+        hist = self.histogram(name)
+        sleep_ms = asyncio.sleep_ms
+
+        async def sleep(ms):
+            t_0 = ticks_us()
+            await sleep_ms(ms)
+            late_us = ticks_diff(ticks_us(), t_0) - ms * 1000
+            if late_us < 0:
+                late_us = 0
+            hist.add(late_us)
+            if late_us > slack_ms * 1000:
+                hist.misses += 1
+
+        return sleep
+
+    def frame_time(self, frame_end, name):
+        """ return frame_end(t_frame) replacement that adds the time
+            from t_frame to the end of frame_end to histogram name
+        """
+        add = self.histogram(name).add
+
+        def timed(t_frame):
+            frame_end(t_frame)
+            add(ticks_diff(ticks_us(), t_frame))
+
+        return timed
+
+    def install(self, system):
+        """ instrument a LightingSystem before it runs """
+        system.profiler = self
+        self.wrap(system.pxl_drv, 'write', 'write')
+        self.wrap(system.pxl_drv, 'set_range_lin', 'effect')
+        self.wrap(system.pxl_drv, 'set_list_lin', 'effect')
+        lcd = system.lcd.lcd
+        for attr in ('write_line', 'write_char', 'write_glyph', 'write_bar'):
+            self.wrap(lcd, attr, 'lcd.' + attr)
+        for zone in system.zones:
+            self.wrap_async(zone, 'transition', 'transition')
+            for state in zone.states:
+                self.wrap_steps(state, 'state_enter', 'state.' + state.name)
+        self.wrap(system.gc_sched, 'collect', 'gc')
+        system.frame_sleep = self.deadline_sleep('frame', system.frame_ms)
+        system.frame_end = self.frame_time(system.frame_end, 'render')
+
+    def lines(self):
+        """ return list of summary lines; unused histograms are skipped """
+        return [self.hists[name].summary() for name in self._order
+                if self.hists[name].n]
+
+    def dump(self):
+        """ print summary to the console """
+        print('Profile:')
+        for line in self.lines():
+            print(f'  {line}')
+
+    async def cycle_lcd(self, lcd, period_ms=2_000):
+        """ coro: show each histogram on the display: name; n, mean, max """
+        for name in self._order:
+            h = self.hists[name]
+            if not h.n:
+                continue
+            mean = h.total_us // h.n
+            lcd.write_display(name, f'{h.n} {mean}/{h.max_us}us')
+            await asyncio.sleep_ms(period_ms)
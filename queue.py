@@ -1,6 +1,7 @@
 # queue.py
 
 import asyncio
+from micropython import const
 
 class Buffer:
     """
@@ -38,49 +39,262 @@ class Buffer:
             return self._item
 
 
+def _ring(length, pow2):
+    """ return (length, wrap) for a ring buffer
+        - wrap(i) maps an index in 0 ... 2 * length - 1 into the ring
+        - pow2: length is rounded up to a power of two; wrap by bit-mask
+        - otherwise: wrap by compare and subtract
+        - chosen once: every put and get path uses the same wrap
+    """
+    if pow2:
+        size = 1
+        while size < length:
+            size <<= 1
+        mask = size - 1
+
+        def wrap(i):
+            return i & mask
+
+        return size, wrap
+
+    def wrap(i):
+        return i - length if i >= length else i
+
+    return length, wrap
+
+
 class Queue:
     """ FIFO queue
         - using array rather than list gave no measurable advantages
+        - put(), get(): one item per lock acquisition
+        - put_many(), get_many(): up to n items per lock acquisition
+        - put_nowait(), get_nowait(): no lock and no wait;
+            IndexError if full or empty
+        - pow2: length is rounded up to a power of two and
+            indices wrap by bit-mask rather than by compare; see _ring()
     """
 
-    def __init__(self, length):
+    def __init__(self, length, pow2=False):
         super().__init__()
-        self.length = length
+        self.length, self._wrap = _ring(length, pow2)
         self.is_data = asyncio.Event()
         self.is_space = asyncio.Event()
         self.put_lock = asyncio.Lock()
         self.get_lock = asyncio.Lock()
         self.is_space.set()
-        self.queue = [None] * length
+        self.queue = [None] * self.length
         self.head = 0
         self.next = 0
+        self.n = 0
 
     async def put(self, item):
         """ coro: add item to the queue """
         async with self.put_lock:
             await self.is_space.wait()
-            self.queue[self.next] = item
-            self.next = (self.next + 1) % self.length
-            if self.next == self.head:
-                self.is_space.clear()
-            self.is_data.set()
+            self.put_nowait(item)
 
     async def get(self):
         """ coro: remove item from the queue """
         async with self.get_lock:
             await self.is_data.wait()
-            item = self.queue[self.head]
-            self.head = (self.head + 1) % self.length
-            if self.head == self.next:
+            return self.get_nowait()
+
+    def put_nowait(self, item):
+        """ add item to the queue; IndexError if full """
+        if self.n == self.length:
+            raise IndexError('queue full')
+        self.queue[self.next] = item
+        self.next = self._wrap(self.next + 1)
+        self.n += 1
+        if self.n == self.length:
+            self.is_space.clear()
+        self.is_data.set()
+
+    def get_nowait(self):
+        """ remove item from the queue; IndexError if empty """
+        if not self.n:
+            raise IndexError('queue empty')
+        item = self.queue[self.head]
+        self.head = self._wrap(self.head + 1)
+        self.n -= 1
+        if not self.n:
+            self.is_data.clear()
+        self.is_space.set()
+        return item
+
+    async def put_many(self, items):
+        """ coro: add all items, as many per lock acquisition as space allows
+            - each batch is copied as at most two runs: no per-item wrap
+        """
+        queue = self.queue
+        length = self.length
+        i = 0
+        n_items = len(items)
+        async with self.put_lock:
+            while i < n_items:
+                await self.is_space.wait()
+                k = min(length - self.n, n_items - i)
+                j = self.next
+                run = min(k, length - j)
+                for m in range(j, j + run):
+                    queue[m] = items[i]
+                    i += 1
+                for m in range(k - run):
+                    queue[m] = items[i]
+                    i += 1
+                self.next = self._wrap(j + k)
+                self.n += k
+                if self.n == length:
+                    self.is_space.clear()
+                self.is_data.set()
+
+    async def get_many(self, max_n):
+        """ coro: remove and return list of 1 to max_n items """
+        queue = self.queue
+        length = self.length
+        async with self.get_lock:
+            await self.is_data.wait()
+            k = min(max_n, self.n)
+            items = [None] * k
+            j = self.head
+            run = min(k, length - j)
+            i = 0
+            for m in range(j, j + run):
+                items[i] = queue[m]
+                i += 1
+            for m in range(k - run):
+                items[i] = queue[m]
+                i += 1
+            self.head = self._wrap(j + k)
+            self.n -= k
+            if not self.n:
                 self.is_data.clear()
             self.is_space.set()
-            return item
+            return items
 
     @property
     def q_len(self):
         """ number of items in the queue """
-        if self.head == self.next:
-            n = self.length if self.is_data.is_set() else 0
-        else:
-            n = (self.next - self.head) % self.length
-        return n
+        return self.n
+
+
+class RingQueue:
+    """ fixed-size ring queue with overflow policy
+        - put_nowait() never blocks and does not allocate
+            -- safe from micropython.schedule() callbacks: the consumer
+                is woken by an asyncio.ThreadSafeFlag, not an Event;
+                not from hard IRQs
+            -- one consumer task per queue: ThreadSafeFlag has one waiter
+        - on overflow, policy:
+            -- DROP_OLDEST: oldest item is overwritten
+            -- DROP_NEWEST: new item is discarded
+            -- COALESCE: item equal to one already queued is discarded;
+                otherwise as DROP_OLDEST
+        - drops counts items lost, including coalesced items
+        - pow2: as Queue
+    """
+
+    DROP_OLDEST = const(0)
+    DROP_NEWEST = const(1)
+    COALESCE = const(2)
+
+    def __init__(self, length, policy=DROP_OLDEST, pow2=False):
+        self.length, self._wrap = _ring(length, pow2)
+        self.policy = policy
+        self.queue = [None] * self.length
+        self.head = 0
+        self.n = 0
+        self.drops = 0
+        self.is_data = asyncio.ThreadSafeFlag()
+
+    def put_nowait(self, item):
+        """ add item; return False if an item was dropped """
+        queue = self.queue
+        wrap = self._wrap
+        if self.policy == self.COALESCE:
+            i = self.head
+            for _ in range(self.n):
+                if queue[i] == item:
+                    self.drops += 1
+                    return False
+                i = wrap(i + 1)
+        kept = True
+        if self.n == self.length:
+            self.drops += 1
+            kept = False
+            if self.policy == self.DROP_NEWEST:
+                return kept
+            queue[self.head] = None
+            self.head = wrap(self.head + 1)
+            self.n -= 1
+        queue[wrap(self.head + self.n)] = item
+        self.n += 1
+        self.is_data.set()
+        return kept
+
+    def get_nowait(self):
+        """ remove and return oldest item; IndexError if empty """
+        if not self.n:
+            raise IndexError('queue empty')
+        item = self.queue[self.head]
+        self.queue[self.head] = None
+        self.head = self._wrap(self.head + 1)
+        self.n -= 1
+        return item
+
+    async def get(self):
+        """ coro: remove and return oldest item, waiting if empty
+            - the flag may be left set by an item already taken: n is
+                checked again after each wake-up
+        """
+        while not self.n:
+            await self.is_data.wait()
+        return self.get_nowait()
+
+
+class EventBus:
+    """ publish/subscribe by topic
+        - each subscriber has its own RingQueue, for one or more topics
+        - publish_nowait() does not block and may be called from
+            micropython.schedule() callbacks: see RingQueue.put_nowait()
+        - per-topic counters: published, drops; depth is the
+            largest queue length among topic subscribers
+    """
+
+    def __init__(self):
+        self.topics = {}  # topic: list of subscriber queues
+        self.published = {}
+        self.drops = {}
+
+    def subscribe(self, topics, length=8, policy=RingQueue.DROP_OLDEST):
+        """ return RingQueue that receives items published to topics """
+        queue = RingQueue(length, policy)
+        if isinstance(topics, str):
+            topics = (topics,)
+        for topic in topics:
+            self.topics.setdefault(topic, []).append(queue)
+            self.published.setdefault(topic, 0)
+            self.drops.setdefault(topic, 0)
+        return queue
+
+    def publish_nowait(self, topic, item):
+        """ add item to each subscriber queue for topic """
+        subscribers = self.topics.get(topic)
+        if subscribers is None:
+            return
+        self.published[topic] += 1
+        for queue in subscribers:
+            if not queue.put_nowait(item):
+                self.drops[topic] += 1
+
+    async def publish(self, topic, item):
+        """ coro: publish then yield to subscribers """
+        self.publish_nowait(topic, item)
+        await asyncio.sleep_ms(0)
+
+    def stats(self):
+        """ return dict of topic: (published, depth, drops) """
+        return {topic: (self.published[topic],
+                        max([q.n for q in self.topics[topic]]),
+                        self.drops[topic])
+                for topic in self.topics}
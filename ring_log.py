@@ -0,0 +1,107 @@
+# ring_log.py
+"""
+    Deferred logging: record events now, format and print later
+
+    - an entry is (ticks_ms, code, a, b, c): a code and up to three
+        small-integer args in preallocated arrays; logging does no
+        formatting and no allocation
+    - each code is defined once with its level and a str.format()
+        string; an arg can be looked up in a table of names, such as
+        state or event names, when the entry is formatted
+    - drain() is a low-priority task that prints new entries a line at
+        a time; dump() prints all retained entries on demand
+    - the ring keeps the last n entries; older undrained entries are
+        counted as lost
+    - levels are chosen at compile time, not filtered at run time:
+        DEBUG calls are written as 'if __debug__: log.log(...)' and are
+        removed entirely by the compiler at optimisation level 1 or
+        higher; INFO and WARN calls are always compiled in. The level
+        of each entry is shown when it is formatted
+    - codes are defined in order from 0, so that callers can use
+        const() codes; see log_codes.py
+"""
+
+import asyncio
+from array import array
+
+from time import ticks_ms
+from micropython import const
+
+DEBUG = const(0)
+INFO = const(1)
+WARN = const(2)
+LEVEL_NAMES = ('D', 'I', 'W')
+
+
+class RingLog:
+    """ ring buffer of coded entries """
+
+    def __init__(self, n=64):
+        self.n = n
+        self.t_ms = array('I', [0] * n)
+        self.codes = array('H', [0] * n)
+        self.arg_a = array('i', [0] * n)
+        self.arg_b = array('i', [0] * n)
+        self.arg_c = array('i', [0] * n)
+        self.head = 0  # entries logged
+        self.tail = 0  # entries drained
+        self.n_lost = 0
+        self._levels = bytearray()  # by code
+        self._formats = []  # (format, name tables) by code
+
+    def define(self, code, level, fmt, *tables):
+        """ define entry type code; codes are defined in order from 0
+            - tables: per arg, a sequence of names or None for the value
+        """
+        if code != len(self._formats):
+            raise ValueError(f'log code {code}: expected {len(self._formats)}')
+        self._levels.append(level)
+        self._formats.append((fmt, tables))
+
+    def log(self, code, a=0, b=0, c=0):
+        """ record entry """
+        i = self.head % self.n
+        self.t_ms[i] = ticks_ms()
+        self.codes[i] = code
+        self.arg_a[i] = a
+        self.arg_b[i] = b
+        self.arg_c[i] = c
+        self.head += 1
+
+    def format(self, j):
+        """ return text of entry j; j counts from the first entry """
+        i = j % self.n
+        fmt, tables = self._formats[self.codes[i]]
+        args = [self.arg_a[i], self.arg_b[i], self.arg_c[i]]
+        for k, table in enumerate(tables):
+            if table is not None:
+                args[k] = table[args[k]]
+        level = LEVEL_NAMES[self._levels[self.codes[i]]]
+        return f'{self.t_ms[i]:>10}ms {level} ' + fmt.format(*args)
+
+    def _first(self):
+        """ return index of the oldest retained entry """
+        return max(self.head - self.n, 0)
+
+    def _pending(self):
+        """ return index of the next entry to drain; count any lost """
+        first = self._first()
+        if self.tail < first:
+            self.n_lost += first - self.tail
+            self.tail = first
+        return self.tail
+
+    async def drain(self, period_ms=500):
+        """ coro: print new entries, yielding between lines """
+        while True:
+            await asyncio.sleep_ms(period_ms)
+            while self._pending() < self.head:
+                print(self.format(self.tail))
+                self.tail += 1
+                await asyncio.sleep_ms(0)
+
+    def dump(self):
+        """ print retained entries """
+        print(f'Log: {self.head} entries, {self.n_lost} lost')
+        for j in range(self._first(), self.head):
+            print(f'  {self.format(j)}')
@@ -0,0 +1,62 @@
+# state_table.py
+"""
+    Declarative state machine compiled to a dispatch table
+
+    Definition is a dict, usually read from a JSON file by config.read_cf:
+    {
+        'initial': 'Start',
+        'states': ['Start', 'Off', ...],
+        'events': ['auto', 'A1', ...],
+        'transitions': {'Start': {'auto': 'Off'}, 'Off': {'A1': 'Day', ...}, ...}
+    }
+    - state names must match the state classes registered by the system
+    - an event not listed for a state is ignored in that state
+
+    Compiled form:
+    - states, events: tuples of names; the index is the integer id
+    - table: bytearray of n_states x n_events next-state ids; NONE: no transition
+"""
+
+from micropython import const
+from config import read_cf
+
+
+class StateTable:
+    """ (state, event) -> state dispatch table """
+
+    NONE = const(0xff)
+
+    @classmethod
+    def from_cf(cls, filename, default):
+        """ return table compiled from JSON file; default written if missing """
+        return cls(read_cf(filename, default))
+
+    def __init__(self, definition):
+        self.states = tuple(definition['states'])
+        self.events = tuple(definition['events'])
+        self.state_index = {name: i for i, name in enumerate(self.states)}
+        self.event_index = {name: i for i, name in enumerate(self.events)}
+        self.n_events = len(self.events)
+        if len(self.states) >= self.NONE:
+            raise ValueError(f'Too many states: {len(self.states)}')
+        self.initial = self._state_id(definition['initial'], 'Initial')
+        self.table = bytearray([self.NONE] * (len(self.states) * self.n_events))
+        transitions = definition['transitions']
+        for state in transitions:
+            base = self._state_id(state, 'Transitions') * self.n_events
+            for event in transitions[state]:
+                if event not in self.event_index:
+                    raise ValueError(f'State {state}: unknown event {event}')
+                target = transitions[state][event]
+                self.table[base + self.event_index[event]] = \
+                    self._state_id(target, f'State {state}, event {event}')
+
+    def _state_id(self, name, where):
+        """ return id of state name; ValueError naming where it is used """
+        if name not in self.state_index:
+            raise ValueError(f'{where}: unknown state {name}')
+        return self.state_index[name]
+
+    def next_state(self, state_id, event_id):
+        """ return next-state id, or NONE """
+        return self.table[state_id * self.n_events + event_id]
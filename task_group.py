@@ -0,0 +1,82 @@
+# task_group.py
+"""
+    Task group: the tasks owned by one lighting state
+
+    - create_task() starts a task in the group; at most max_tasks are
+        live: a coroutine over the bound is closed, not started, and
+        counted as refused
+    - cancel() cancels all live tasks and awaits each, so that no task
+        of the group is running when it returns
+    - counts: started, cancelled, refused and errors; live() prunes and
+        returns the live count
+    - memory: gc.mem_alloc() is read at start() and at cancel();
+        mem_delta is the change over the last period the group ran,
+        before any collection by the caller
+"""
+
+import asyncio
+import gc
+
+
+class TaskGroup:
+    """ bounded set of tasks that are cancelled together """
+
+    def __init__(self, max_tasks=4):
+        self.max_tasks = max_tasks
+        self.tasks = []
+        self.n_started = 0
+        self.n_cancelled = 0
+        self.n_refused = 0
+        self.n_errors = 0
+        self.mem_0 = 0
+        self.mem_delta = 0
+
+    def live(self):
+        """ drop finished tasks; return live count """
+        tasks = self.tasks
+        i = 0
+        while i < len(tasks):
+            if tasks[i].done():
+                tasks.pop(i)
+            else:
+                i += 1
+        return len(tasks)
+
+    def start(self, coro):
+        """ record memory in use, then run coro as the first task """
+        self.mem_0 = gc.mem_alloc()
+        return self.create_task(coro)
+
+    def create_task(self, coro):
+        """ return new task in the group, or None if the group is full """
+        if self.live() >= self.max_tasks:
+            coro.close()
+            self.n_refused += 1
+            return None
+        task = asyncio.create_task(coro)
+        self.tasks.append(task)
+        self.n_started += 1
+        return task
+
+    async def cancel(self):
+        """ coro: cancel live tasks and await their ends """
+        tasks = self.tasks
+        self.live()
+        for task in tasks:
+            task.cancel()
+        while tasks:
+            task = tasks.pop()
+            try:
+                await task
+            except asyncio.CancelledError:
+                self.n_cancelled += 1
+            except Exception as e:
+                self.n_errors += 1
+                print(f'Task error: {e!r}')
+        self.mem_delta = gc.mem_alloc() - self.mem_0
+
+    def summary(self):
+        """ return one-line summary """
+        return (f'live {self.live()} started {self.n_started} '
+                f'cancelled {self.n_cancelled} refused {self.n_refused} '
+                f'mem {self.mem_delta:+}')
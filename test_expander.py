@@ -0,0 +1,47 @@
+# test_expander.py
+
+""" print button events from an I2C expander, with scan statistics
+    - MCP23017 or PCF8575 at 0x20; buttons between each pin and ground
+    - on a host, with simulated expanders: python -m host.sim_expander
+"""
+
+import asyncio
+from machine import Pin, I2C
+
+from buttons import ButtonGroup
+from expander import Pcf8575, Mcp23017, ExpanderButton, ExpanderButtonGroup
+from queue import EventBus
+
+ADDR = 0x20
+MCP23017 = True
+
+
+async def main():
+    """ coro: print events and scan statistics """
+    i2c = I2C(0, sda=Pin(20), scl=Pin(21), freq=400_000)
+    chip = Mcp23017(i2c, ADDR) if MCP23017 else Pcf8575(i2c, ADDR)
+    button_set = tuple([ExpanderButton(0, bit, f'K{bit}', hold=True)
+                        for bit in range(16)])
+    bus = EventBus()
+    events = bus.subscribe((ButtonGroup.TOPIC,))
+    group = ExpanderButtonGroup((chip,), button_set, bus)
+    group.list_buttons()
+    group.poll_buttons()
+
+    async def report():
+        while True:
+            await asyncio.sleep_ms(5_000)
+            n_scans, mean_us, max_us = group.scan_stats()
+            print(f'scans: {n_scans}; mean: {mean_us}us; max: {max_us}us')
+
+    asyncio.create_task(report())
+    while True:
+        print(await events.get())
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    finally:
+        asyncio.new_event_loop()  # clear retained state
+        print('execution complete')
@@ -1,15 +1,12 @@
-import machine
-from machine import Pin, I2C
-from lcd_44780 import LcdApi
+from lcd_44780 import Lcd44780
 from time import sleep
 
-I2C_ADDR = 0x27
 BLANK_LINE = " " * 16
 rows = 2
 columns = 16
-lcd = LcdApi(scl=Pin(3), sda=Pin(2), rows=rows, cols=columns)
+lcd = Lcd44780({'sda': 2, 'scl': 3}, (columns, rows))
 
-lcd.put_str("I2C LCD Tutorial")
+lcd.write_line(0, "I2C LCD Tutorial")
 sleep(2)
 lcd.clear()
 lcd.write_line(0, "Count 0...10")
@@ -19,3 +16,4 @@ for i in range(11):
     sleep(1)
     lcd.write_line(1, BLANK_LINE)
 lcd.clear()
+print(f'I2C: {lcd.n_trans} transactions, {lcd.n_bytes} bytes')
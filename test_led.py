@@ -3,7 +3,7 @@
 """ test LED- and NeoPixel-related classes on Pi Pico """
 
 import asyncio
-from led_pwm import PWMLed
+from led_pwm import PWMLed, PWMFadeGroup
 from colour_space import ColourSpace
 
 # helper coroutines
@@ -66,6 +66,23 @@ async def twin_flash(led_0, led_1, dc_u8, period_ms=500):
         await asyncio.sleep_ms(period_ms)
 
 
+async def group_fade(leds, lin_level_, period_ms=2_000):
+    """ coro: fade leds in then out, staggered, from one task
+        - 12-bit linear levels are gamma corrected to u16
+    """
+    group = PWMFadeGroup(leds, lut=ColourSpace.gamma_u16(12))
+    task = asyncio.create_task(group.run())
+    for i in range(len(leds)):
+        group.fade(i, lin_level_ * 4095 // 255, period_ms)
+        await asyncio.sleep_ms(200)
+    await asyncio.sleep_ms(period_ms)
+    for i in range(len(leds)):
+        group.fade(i, 0, period_ms)
+    await asyncio.sleep_ms(period_ms + 100)
+    task.cancel()
+    print(f'group: {group.n_steps} channel-steps; {group.n_writes} writes')
+
+
 async def main():
     # build gamma-correction tuple
     dc_gamma = ColourSpace().RGB_GAMMA
@@ -104,6 +121,10 @@ async def main():
         led.turn_off()
     await asyncio.sleep_ms(1_000)
 
+    print('group fade')
+    await group_fade(led_list, lin_level)
+    await asyncio.sleep_ms(1_000)
+
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,117 @@
+# test_queue.py
+
+""" benchmark queue.Queue: items/sec for single-item, batch and nowait methods
+    - BaseQueue, the earlier Queue, is the comparison case for put/get
+    - on a host:
+        python -c "import host; host.install(); import asyncio, test_queue; asyncio.run(test_queue.main())"
+"""
+
+import asyncio
+from time import ticks_us, ticks_diff
+from queue import Queue
+
+N_ITEMS = 2_000
+BATCH = 16
+
+
+class BaseQueue:
+    """ earlier queue.Queue, for comparison: modulo indexing, no item count """
+
+    def __init__(self, length):
+        self.length = length
+        self.is_data = asyncio.Event()
+        self.is_space = asyncio.Event()
+        self.put_lock = asyncio.Lock()
+        self.get_lock = asyncio.Lock()
+        self.is_space.set()
+        self.queue = [None] * length
+        self.head = 0
+        self.next = 0
+
+    async def put(self, item):
+        """ coro: add item to the queue """
+        async with self.put_lock:
+            await self.is_space.wait()
+            self.queue[self.next] = item
+            self.next = (self.next + 1) % self.length
+            if self.next == self.head:
+                self.is_space.clear()
+            self.is_data.set()
+
+    async def get(self):
+        """ coro: remove item from the queue """
+        async with self.get_lock:
+            await self.is_data.wait()
+            item = self.queue[self.head]
+            self.head = (self.head + 1) % self.length
+            if self.head == self.next:
+                self.is_data.clear()
+            self.is_space.set()
+            return item
+
+
+async def single_item(q):
+    """ coro: producer and consumer: put() and get() """
+
+    async def producer():
+        for i in range(N_ITEMS):
+            await q.put(i)
+
+    async def consumer():
+        for _ in range(N_ITEMS):
+            await q.get()
+
+    await asyncio.gather(producer(), consumer())
+
+
+async def batch(q):
+    """ coro: producer and consumer: put_many() and get_many() """
+    items = list(range(BATCH))
+
+    async def producer():
+        for _ in range(N_ITEMS // BATCH):
+            await q.put_many(items)
+
+    async def consumer():
+        n = 0
+        while n < N_ITEMS:
+            n += len(await q.get_many(BATCH))
+
+    await asyncio.gather(producer(), consumer())
+
+
+async def nowait(q):
+    """ coro: single task: put_nowait() and get_nowait() """
+    for i in range(N_ITEMS // BATCH):
+        for j in range(BATCH):
+            q.put_nowait(j)
+        for _ in range(BATCH):
+            q.get_nowait()
+        await asyncio.sleep_ms(0)
+
+
+async def time_run(name, coro_fn, q):
+    """ coro: run and print items/sec """
+    t_0 = ticks_us()
+    await coro_fn(q)
+    t_us = ticks_diff(ticks_us(), t_0)
+    print(f'{name:<24} {N_ITEMS * 1_000_000 // max(t_us, 1):>10,} items/s')
+
+
+async def main():
+    """ coro: compare queue methods """
+    print(f'Queue throughput: {N_ITEMS} items')
+    await time_run('put/get baseline', single_item, BaseQueue(32))
+    await time_run('put/get', single_item, Queue(32))
+    await time_run('put_many/get_many', batch, Queue(32))
+    await time_run('put_many/get_many pow2', batch, Queue(32, pow2=True))
+    await time_run('nowait', nowait, Queue(30))
+    await time_run('nowait pow2', nowait, Queue(30, pow2=True))
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    finally:
+        asyncio.new_event_loop()  # clear retained state
+        print('execution complete')
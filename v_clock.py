@@ -2,6 +2,8 @@
 """ cut-down virtual time class to support lighting control """
 
 import asyncio
+from heapq import heappush, heappop
+from time import ticks_ms, ticks_add, ticks_diff
 from micropython import const
 
 
@@ -19,33 +21,235 @@ def conv_m_vt(vm_):
 
 
 class VClock:
-    """ Virtual (fast) time as minutes since midnight """
+    """ Virtual (fast) time as minutes since midnight
+        - speed-up t_mpy: int, or rational as (numerator, denominator)
+        - minute boundaries are absolute deadlines from a ticks_ms epoch:
+            -- epoch is held as ms plus a remainder in 1/numerator ms
+            -- no truncation or scheduling error accumulates
+        - timer wheel: one slot per virtual minute of the day
+            -- cues are registered at virtual times: one-shot, daily or periodic
+            -- a cue target is a callable, called with virtual minutes,
+                or an asyncio.Event, which is set
+        - a heap of due times, as absolute virtual minutes, indexes the
+            occupied slots: the next due slot is the heap top; entries
+            for slots already dispatched are dropped as they surface
+        - the clock sleeps until the next occupied slot, then dispatches
+            that slot only: O(1) per tick for any number of cues
+        - seek() and set_rate() re-evaluate pending cues
+    """
 
     M_IN_DAY = const(24 * 60)
 
     def __init__(self, t_mpy=1):
-        self.m_ms = 60_000 // t_mpy  # fraction of ms in 1 minute
-        self._vt_m = 0
-        self.minute_ev = asyncio.Event()  # virtual minute update
-        asyncio.create_task(self.tick())
+        self._num = 1
+        self._den = 1
+        self._vt_m = 0  # virtual minute at epoch
+        self._abs_m = 0  # absolute virtual minute at epoch: % M_IN_DAY == _vt_m
+        self._due = []  # heap of absolute minutes of occupied slots
+        self._epoch = ticks_ms()
+        self._frac = 0  # epoch remainder: 1/_num ms
+        self._wheel = [None] * self.M_IN_DAY  # slot: list of cues, or None
+        self._n_cues = 0
+        self._dispatching = False
+        self._task = asyncio.create_task(self.tick())
+        self.set_rate(t_mpy)
+
+    @property
+    def m_ms(self):
+        """ nominal ms in 1 virtual minute """
+        return 60_000 * self._den // self._num
 
     @property
     def v_minutes(self):
         """ return virtual minutes since midnight """
-        return self._vt_m
+        return (self._vt_m + self._elapsed_m()) % self.M_IN_DAY
 
     def init_v_time(self, vt_m_):
-        """ initialise virtual time """
+        """ initialise virtual time; no cues are dispatched """
+        self._set_epoch(vt_m_)
+        self._reschedule()
+
+    def seek(self, vt_m_):
+        """ jump to virtual minutes; dispatch cues due at vt_m_
+            - cues between the old and new times are not dispatched
+            - one-shot and daily cues keep their virtual times
+            - cues with periods of less than a day restart at vt_m_:
+                they are dispatched now, then every period
+        """
+        self._set_epoch(vt_m_ % self.M_IN_DAY)
+        self._rephase()
+        if self._wheel[self._vt_m] is not None:
+            self._dispatch(self._vt_m)
+        self._reschedule()
+
+    def set_rate(self, t_mpy):
+        """ set speed-up as int or (numerator, denominator)
+            - the current virtual minute restarts at the new rate
+        """
+        if isinstance(t_mpy, int):
+            t_mpy = (t_mpy, 1)
+        self._set_epoch(self.v_minutes)
+        self._num, self._den = t_mpy
+        self._reschedule()
+
+    # cue registration
+
+    def at(self, vt_m_, target):
+        """ one-shot cue at virtual minutes; return cue for cancel() """
+        return self._add(vt_m_, [target, 0])
+
+    def daily(self, vt_m_, target):
+        """ daily cue at virtual minutes; return cue for cancel() """
+        return self._add(vt_m_, [target, self.M_IN_DAY])
+
+    def every(self, period_m, target):
+        """ periodic cue from next virtual minute; return cue for cancel() """
+        return self._add(self.v_minutes + 1, [target, period_m])
+
+    def cancel(self, cue):
+        """ cancel cue: removed from wheel when its slot is next dispatched """
+        cue[0] = None
+
+    def _add(self, vt_m_, cue):
+        """ add cue to wheel slot """
+        self._insert(vt_m_ % self.M_IN_DAY, cue)
+        self._n_cues += 1
+        self._reschedule()
+        return cue
+
+    def _insert(self, vt_m_, cue):
+        """ insert cue into wheel slot; index the slot if newly occupied """
+        if self._wheel[vt_m_] is None:
+            self._wheel[vt_m_] = [cue]
+            self._push(vt_m_)
+        else:
+            self._wheel[vt_m_].append(cue)
+
+    def _push(self, vt_m_):
+        """ index slot vt_m_ by its next due time: after now; now + 1 day at most """
+        d_m = (vt_m_ - self._vt_m) % self.M_IN_DAY
+        heappush(self._due, self._abs_m + (d_m or self.M_IN_DAY))
+
+    def _reindex(self):
+        """ rebuild the due-time heap from the wheel """
+        self._due = []
+        for i in range(self.M_IN_DAY):
+            if self._wheel[i] is not None:
+                self._push(i)
+
+    def _reschedule(self):
+        """ restart tick() to sleep to the (possibly changed) next cue """
+        if not self._dispatching:
+            self._task.cancel()
+            self._task = asyncio.create_task(self.tick())
+
+    # clock
+
+    def _set_epoch(self, vt_m_):
+        """ start virtual minute vt_m_ now; reindex if the minute changes """
+        changed = vt_m_ != self._vt_m
+        self._abs_m += (vt_m_ - self._vt_m) % self.M_IN_DAY
         self._vt_m = vt_m_
+        self._epoch = ticks_ms()
+        self._frac = 0
+        if changed:
+            self._reindex()
+
+    def _elapsed_m(self):
+        """ whole virtual minutes since epoch """
+        elapsed = ticks_diff(ticks_ms(), self._epoch) * self._num - self._frac
+        return max(elapsed // (60_000 * self._den), 0)
+
+    def _deadline(self, k_m):
+        """ ticks_ms at k_m virtual minutes after epoch; rounded up """
+        return ticks_add(self._epoch,
+                         -(-(self._frac + k_m * 60_000 * self._den) // self._num))
+
+    def _advance(self, k_m):
+        """ move epoch forward by k_m virtual minutes, exactly """
+        total = self._frac + k_m * 60_000 * self._den
+        self._epoch = ticks_add(self._epoch, total // self._num)
+        self._frac = total % self._num
+        self._vt_m = (self._vt_m + k_m) % self.M_IN_DAY
+        self._abs_m += k_m
+
+    def _rephase(self):
+        """ move sub-daily periodic cues to the epoch minute """
+        wheel = self._wheel
+        periodic = []
+        for i in range(self.M_IN_DAY):
+            slot = wheel[i]
+            if slot is not None:
+                for cue in slot:
+                    if 0 < cue[1] < self.M_IN_DAY:
+                        periodic.append(cue)
+                wheel[i] = [cue for cue in slot if not 0 < cue[1] < self.M_IN_DAY] or None
+        for cue in periodic:
+            self._insert(self._vt_m, cue)
+        self._reindex()
+
+    def _catch_up(self):
+        """ move epoch to the current virtual minute; dispatch overdue
+            slots in order on the way, so that no cue is lost when tick()
+            restarts after its deadlines have passed
+        """
+        end_m = self._abs_m + self._elapsed_m()
+        due = self._due
+        while due and due[0] <= end_m:
+            abs_m = heappop(due)
+            vt_m = abs_m % self.M_IN_DAY
+            if abs_m > self._abs_m and self._wheel[vt_m] is not None:
+                self._advance(abs_m - self._abs_m)
+                self._dispatch(vt_m)
+        if end_m > self._abs_m:
+            self._advance(end_m - self._abs_m)
+
+    def _next_due(self):
+        """ return virtual minutes from epoch to next occupied slot; 0 if none
+            - heap top; entries that are past, or for emptied slots, are dropped
+        """
+        due = self._due
+        while due:
+            abs_m = due[0]
+            if abs_m > self._abs_m and self._wheel[abs_m % self.M_IN_DAY] is not None:
+                return abs_m - self._abs_m
+            heappop(due)
+        return 0
+
+    def _dispatch(self, vt_m_):
+        """ dispatch all cues in slot vt_m_; re-insert periodic cues """
+        slot = self._wheel[vt_m_]
+        self._wheel[vt_m_] = None
+        self._dispatching = True
+        try:
+            for cue in slot:
+                target, period = cue
+                if target is None:  # cancelled
+                    self._n_cues -= 1
+                    continue
+                if period:
+                    self._insert((vt_m_ + period) % self.M_IN_DAY, cue)
+                else:
+                    self._n_cues -= 1
+                if callable(target):
+                    target(vt_m_)
+                else:
+                    target.set()
+        finally:
+            self._dispatching = False
 
     async def tick(self):
-        """ run virtual clock at 1-tick/virtual-minute
-            - v-minute duration specified in ms
+        """ sleep until next occupied slot then dispatch it
+            - epoch is first moved to the current virtual minute,
+                dispatching any overdue slots: see _catch_up()
+            - task ends if no cues: restarted when a cue is added
         """
-        m_ms_ = self.m_ms
+        self._catch_up()
         while True:
-            await asyncio.sleep_ms(m_ms_)
-            self._vt_m += 1
-            if self._vt_m == self.M_IN_DAY:
-                self._vt_m = 0
-            self.minute_ev.set()
+            d_m = self._next_due()
+            if not d_m:
+                return
+            await asyncio.sleep_ms(
+                max(ticks_diff(self._deadline(d_m), ticks_ms()), 0))
+            self._advance(d_m)
+            self._dispatch(self._vt_m)
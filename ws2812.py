@@ -60,6 +60,10 @@ class Ws2812:
         """
         self.sm.put(self.arr, self.GRB_SHIFT)
 
+    def write_arr(self, arr):
+        """ put a frame array other than self.arr; see dual_core.py """
+        self.sm.put(arr, self.GRB_SHIFT)
+
     def set_n_pixels(self, n_pixels_):
         """ set n_pixels and arr size """
         self.n_pixels = n_pixels_
@@ -69,3 +73,8 @@ class Ws2812:
     def encode_rgb(rgb_):
         """ encode R,G,B as 24-bit GRB word """
         return (rgb_[1] << 16) + (rgb_[0] << 8) + rgb_[2]
+
+    @staticmethod
+    def encode_ints(r, g, b):
+        """ encode r, g, b ints as 24-bit GRB word: no tuple needed """
+        return (g << 16) + (r << 8) + b